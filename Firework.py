@@ -12,18 +12,48 @@ Thank you for respecting the work of the original creator.
 """
 
 import asyncio
+import os
 import pygame, random, math, time
+import numpy as np
 from pygame.math import Vector2
 
-pygame.init()
-
-async def main():
+# Cloud noise is cached as .npy next to FireworkV3.5's assets, keyed by resolution and seed;
+CACHE_DIR = os.environ.get("FIREWORKS_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "fireworks"))
+
+
+def load_cloud_noise(w, h, seed):
+    path = os.path.join(CACHE_DIR, f"firework-clouds-{w}x{h}-s{seed}-v1.npy")
+    try:
+        return np.load(path, mmap_mode="r")
+    except (OSError, ValueError):
+        pass
+    # Own RandomState, so a cache hit leaves the global random stream where a miss would;
+    noise = np.random.RandomState(seed).randint(0, 81, (h, w), dtype=np.uint8)
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as fh:
+            np.save(fh, noise)
+        os.replace(tmp, path)
+    except OSError:
+        pass
+    return noise
+
+
+async def main(benchmark=None):
+    # Only the subsystems the simulation uses;
+    pygame.display.init()
+    pygame.font.init()
     WIDTH, HEIGHT = 1600, 900
-    SCREEN = pygame.display.set_mode(
-        (WIDTH, HEIGHT),
-        pygame.DOUBLEBUF | pygame.SCALED,
-        vsync=1
-    )
+    if benchmark is not None:
+        random.seed(benchmark["seed"])
+        SCREEN = pygame.display.set_mode((WIDTH, HEIGHT))
+    else:
+        SCREEN = pygame.display.set_mode(
+            (WIDTH, HEIGHT),
+            pygame.DOUBLEBUF | pygame.SCALED,
+            vsync=1
+        )
     pygame.display.set_caption("Starry Fireworks Simulation (OPTIMIZED-RELEASE)")
     CLOCK = pygame.time.Clock()
 
@@ -255,11 +285,11 @@ async def main():
 
         def generate_noise_surf(self):
             w2, h2 = WIDTH // 2, HEIGHT // 2
-            surf = pygame.Surface((w2, h2), pygame.SRCALPHA)
-            for y in range(h2):
-                for x in range(w2):
-                    val = random.randint(0, 80)
-                    surf.set_at((x, y), (val, val, val, 255))
+            noise = load_cloud_noise(w2, h2, benchmark["seed"] if benchmark is not None else 0)
+            rgba = np.empty((h2, w2, 4), dtype=np.uint8)
+            rgba[..., :3] = noise[..., None]
+            rgba[..., 3] = 255
+            surf = pygame.image.frombuffer(rgba.tobytes(), (w2, h2), "RGBA")
             return pygame.transform.smoothscale(surf, (WIDTH, HEIGHT))
 
         def update(self, dt):
@@ -297,6 +327,55 @@ async def main():
     time_since_launch = 0
     launch_interval = 0.15
 
+    if benchmark is not None:
+        # Scripted headless workload: keep `count` fireworks of one mode in flight at a fixed dt;
+        launcher = random.Random(benchmark["seed"])
+        mode, count, dt = benchmark["mode"], benchmark["count"], benchmark["dt"]
+        stages = ("update", "starfield", "clouds", "draw", "bloom", "present", "frame")
+        samples = {stage: [] for stage in stages}
+        for _ in range(benchmark["frames"]):
+            t0 = time.perf_counter()
+            pygame.event.pump()
+            while len(fireworks) < count:
+                pos = (launcher.uniform(0.1, 0.9) * WIDTH, launcher.uniform(0.6, 1.0) * HEIGHT)
+                fireworks.append(Firework(pos, mode))
+            t1 = time.perf_counter()
+            starfield.update(dt)
+            t2 = time.perf_counter()
+            clouds.update(dt)
+            t3 = time.perf_counter()
+            for f in fireworks:
+                f.update(dt)
+            fireworks = [f for f in fireworks if not (f.exploded and not f.particles and not f.secondary)]
+            t4 = time.perf_counter()
+            buffer_surf = pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA)
+            buffer_surf.fill(BLACK)
+            starfield.draw(buffer_surf)
+            t5 = time.perf_counter()
+            clouds.draw(buffer_surf)
+            t6 = time.perf_counter()
+            for f in fireworks:
+                f.draw(buffer_surf)
+            t7 = time.perf_counter()
+            buffer_surf = bloom_pass(buffer_surf)
+            t8 = time.perf_counter()
+            SCREEN.blit(buffer_surf, (0, 0))
+            ui.draw(SCREEN)
+            pygame.display.flip()
+            t9 = time.perf_counter()
+            for stage, seconds in (
+                ("update", t4 - t3),
+                ("starfield", (t2 - t1) + (t5 - t4)),
+                ("clouds", (t3 - t2) + (t6 - t5)),
+                ("draw", t7 - t6),
+                ("bloom", t8 - t7),
+                ("present", t9 - t8),
+                ("frame", t9 - t0),
+            ):
+                samples[stage].append(seconds * 1000.0)
+        pygame.quit()
+        return samples
+
     running = True
     while running:
         dt = CLOCK.tick(0) / 1000 # Avoid capping FPS | Let it rely on vsync;
@@ -342,4 +421,9 @@ async def main():
 
         await asyncio.sleep(0)
     pygame.quit()
-asyncio.run(main())
+
+def run_benchmark(mode, count, frames, seed=0, dt=1 / 60):
+    return asyncio.run(main({"mode": mode, "count": count, "frames": frames, "seed": seed, "dt": dt}))
+
+if __name__ == "__main__":
+    asyncio.run(main())
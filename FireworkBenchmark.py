@@ -0,0 +1,236 @@
+"""
+                             [ DISCLAIMER ]
+                             
+This code and its associated logic were authored by GuestAUser(Lk10). 
+Any use, distribution, or modification of this code MUST include proper credit to the original author. 
+Failure to attribute the original author is a violation of intellectual property rights. 
+By using this code, you agree to comply with these terms.
+
+Thank you for respecting the work of the original creator.
+
+[TIMESTAMP OF PROJECT] (10/18/2026)
+"""
+
+# Headless, deterministic benchmark harness for the Firework entry points.
+#
+# Every (entry point, mode, count) workload runs in its own interpreter on the SDL
+# dummy video driver with a fixed seed, a fixed dt and no vsync; the harness prints
+# (or writes) JSON with p50/p95/p99 frame times per stage.
+#
+#     python FireworkBenchmark.py --counts 10 100 --frames 240 --out bench.json
+#
+# Recorded sessions (FireworkV3.5.py --record) replay as workloads of their own:
+#
+#     python FireworkBenchmark.py --entries --replays field.fwrc
+#
+# The workloads of FireworkV3 and FireworkV3.5 run once per spark render path:
+#
+#     python FireworkBenchmark.py --entries FireworkV3 FireworkV3.5 --render-paths batched immediate
+#
+# The spark renderers of FireworkV3.5 can be compared on their own (draw only):
+#
+#     python FireworkBenchmark.py --entries --draw-counts 10000 100000 1000000
+
+import argparse
+import importlib.util
+import json
+import os
+import subprocess
+import sys
+from typing import Dict, List, Optional
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ENTRY_POINTS = {
+    "Firework": "Firework.py",
+    "FireworkV3": "FireworkV3.py",
+    "FireworkV3.5": "FireworkV3.5.py",
+}
+# Spark render paths per entry point; Firework.py only has its one-blit-per-particle draw;
+RENDER_PATHS = {
+    "FireworkV3": ["batched", "immediate"],
+    "FireworkV3.5": ["batched", "immediate", "splat"],
+}
+MODES = ["burst", "ring", "star", "trail"]
+STAGES = ["update", "draw", "clouds", "starfield", "bloom", "present", "frame"]
+
+
+def load_entry_point(name: str):
+    """Import an entry point by file path (the file names are not valid module names)."""
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+    path = os.path.join(HERE, ENTRY_POINTS[name])
+    spec = importlib.util.spec_from_file_location(name.replace(".", "_"), path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    k = (len(ordered) - 1) * q / 100.0
+    lo = int(k)
+    hi = min(lo + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (k - lo)
+
+
+def describe(values: List[float]) -> Dict[str, float]:
+    return {
+        "p50": round(percentile(values, 50), 4),
+        "p95": round(percentile(values, 95), 4),
+        "p99": round(percentile(values, 99), 4),
+        "mean": round(sum(values) / len(values), 4) if values else 0.0,
+    }
+
+
+def summarize(samples: Dict[str, List[float]]) -> Dict[str, Dict[str, float]]:
+    extra = [key for key in samples if key not in STAGES and key != "counters"]
+    return {stage: describe(samples.get(stage, [])) for stage in STAGES + extra}
+
+
+def summarize_run(samples: Dict[str, List[float]]) -> Dict[str, object]:
+    """Frame count and per-stage timings of one run, plus its profiler counters (not milliseconds) if any."""
+    summary: Dict[str, object] = {"frames": len(samples["frame"]), "stages_ms": summarize(samples)}
+    counters = samples.get("counters")
+    if counters:
+        summary["counters"] = {name: describe(values) for name, values in counters.items()}
+    return summary
+
+
+def nest_counters(module, samples: Dict[str, List[float]]) -> Dict[str, object]:
+    # FrameProfiler samples carry counters (particles, glow_bytes, ...) next to the phase timings;
+    names = getattr(getattr(module, "FrameProfiler", None), "COUNTERS", ())
+    counters = {name: samples.pop(name) for name in names if name in samples}
+    if counters:
+        samples["counters"] = counters
+    return samples
+
+
+def run_child(args: argparse.Namespace) -> None:
+    module = load_entry_point(args.child)
+    if args.replay:
+        result = module.run_replay(args.replay)
+        result["samples"] = nest_counters(module, result["samples"])
+        json.dump(result, sys.stdout)
+        return
+    if args.draw_only:
+        json.dump(module.run_draw_benchmark(args.render_path, args.count, args.frames, seed=args.seed), sys.stdout)
+        return
+    # Only FireworkV3.5 can pipeline its bloom; the others always run it in-frame;
+    extra = {"pipeline_depth": args.pipeline_depth} if args.pipeline_depth else {}
+    if args.render_path:
+        extra["render_path"] = args.render_path
+    samples = module.run_benchmark(args.mode, args.count, args.frames, seed=args.seed, dt=args.dt, **extra)
+    json.dump(nest_counters(module, samples), sys.stdout)
+
+
+def run_workload(entry: str, mode: str, count: int, render_path: Optional[str],
+                 args: argparse.Namespace) -> Dict[str, List[float]]:
+    return run_subprocess([
+        "--child", entry,
+        "--mode", mode,
+        "--count", str(count),
+        "--frames", str(args.frames),
+        "--seed", str(args.seed),
+        "--dt", repr(args.dt),
+        "--pipeline-depth", str(args.pipeline_depth if entry == "FireworkV3.5" else 0),
+    ] + (["--render-path", render_path] if render_path else []))
+
+
+def run_subprocess(child_args: List[str]):
+    cmd = [sys.executable, os.path.abspath(__file__)] + child_args
+    env = dict(os.environ, SDL_VIDEODRIVER="dummy", SDL_AUDIODRIVER="dummy", PYGAME_HIDE_SUPPORT_PROMPT="1")
+    proc = subprocess.run(cmd, capture_output=True, text=True, env=env, check=True)
+    # Entry points may print on import; the samples are always the last line.
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Headless benchmark of the Firework entry points.")
+    parser.add_argument("--entries", nargs="*", default=list(ENTRY_POINTS), choices=list(ENTRY_POINTS))
+    parser.add_argument("--modes", nargs="+", default=MODES, choices=MODES)
+    parser.add_argument("--counts", nargs="+", type=int, default=[10, 100, 1000])
+    parser.add_argument("--frames", type=int, default=240)
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--dt", type=float, default=1 / 60)
+    parser.add_argument("--pipeline-depth", type=int, default=0,
+                        help="FireworkV3.5 frames bloomed in the background; with >0 'bloom' times the wait, not the bloom")
+    parser.add_argument("--render-paths", nargs="+", default=["batched"], metavar="PATH",
+                        help="spark render paths to run the FireworkV3/V3.5 workloads on (batched, immediate, splat)")
+    parser.add_argument("--replays", nargs="+", default=[], metavar="LOG", help="session logs to replay on FireworkV3.5")
+    parser.add_argument("--draw-counts", nargs="+", type=int, default=[], metavar="N",
+                        help="spark counts for a draw-only comparison of FireworkV3.5's render paths")
+    parser.add_argument("--paths", nargs="+", default=["batched", "immediate", "splat"], help="render paths for --draw-counts")
+    parser.add_argument("--draw-frames", type=int, default=10)
+    parser.add_argument("--out", help="write JSON here instead of stdout")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    parser.add_argument("--mode", help=argparse.SUPPRESS)
+    parser.add_argument("--count", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--replay", help=argparse.SUPPRESS)
+    parser.add_argument("--render-path", help=argparse.SUPPRESS)
+    parser.add_argument("--draw-only", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args)
+        return
+
+    report = {
+        "config": {"frames": args.frames, "seed": args.seed, "dt": args.dt, "pipeline_depth": args.pipeline_depth,
+                   "python": sys.version.split()[0]},
+        "results": [],
+    }
+    for entry in args.entries:
+        paths = [p for p in args.render_paths if p in RENDER_PATHS[entry]] if entry in RENDER_PATHS else [None]
+        for mode in args.modes:
+            for count in args.counts:
+                for path in paths:
+                    print(f"[bench] {entry} mode={mode} count={count}" + (f" render_path={path}" if path else ""),
+                          file=sys.stderr)
+                    samples = run_workload(entry, mode, count, path, args)
+                    result = {"entry": entry, "mode": mode, "count": count}
+                    if path:
+                        result["render_path"] = path
+                    result.update(summarize_run(samples))
+                    report["results"].append(result)
+    for log in args.replays:
+        print(f"[bench] FireworkV3.5 replay={log}", file=sys.stderr)
+        result = run_subprocess(["--child", "FireworkV3.5", "--replay", os.path.abspath(log)])
+        report["results"].append({
+            "entry": "FireworkV3.5",
+            "replay": log,
+            "state_matches": result["matches"],
+            **summarize_run(result["samples"]),
+            "frames": result["frames"],  # the profiler's history may hold fewer;
+        })
+
+    for count in args.draw_counts:
+        for path in args.paths:
+            print(f"[bench] FireworkV3.5 render_path={path} count={count}", file=sys.stderr)
+            samples = run_subprocess([
+                "--child", "FireworkV3.5",
+                "--draw-only",
+                "--render-path", path,
+                "--count", str(count),
+                "--frames", str(args.draw_frames),
+                "--seed", str(args.seed),
+            ])
+            report["results"].append({
+                "entry": "FireworkV3.5",
+                "render_path": path,
+                "count": count,
+                **summarize_run(samples),
+            })
+
+    text = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w") as fh:
+            fh.write(text)
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""
+                             [ DISCLAIMER ]
+                             
+This code and its associated logic were authored by GuestAUser(Lk10). 
+Any use, distribution, or modification of this code MUST include proper credit to the original author. 
+Failure to attribute the original author is a violation of intellectual property rights. 
+By using this code, you agree to comply with these terms.
+
+Thank you for respecting the work of the original creator.
+
+[TIMESTAMP OF PROJECT] (10/18/2026)
+"""
+
+# Offline, frame-parallel renderer for pre-rendered shows.
+#
+# A show is a seed plus a launch script; frames are simulated at a fixed dt on the
+# SDL dummy driver, so every frame is a pure function of (seed, script, index). The
+# frame range is split into contiguous slices, one per worker process; each worker
+# fast-forwards the simulation (update only, no drawing) to the start of its slice
+# and renders from there. Output is numbered PNGs or a single raw RGB24 file:
+#
+#     python FireworkRender.py show.json --out frames --workers 4
+#     python FireworkRender.py show.json --out frames --workers 4 --closed-form
+#     python FireworkRender.py show.json --format raw --out show.rgb
+#     ffmpeg -f rawvideo -pix_fmt rgb24 -s 1600x900 -r 60 -i show.rgb show.mp4
+#
+# The launch script is a JSON or TOML show file, as read by LaunchScheduler in
+# FireworkV3.5.py: timed cues plus optional "seed", "width", "height", "fps" and
+# "duration" metadata.
+#
+# With --closed-form each worker compiles the show to a ShowTimeline and evaluates
+# sparks directly at every frame it draws, so seeking to its slice skips all
+# particle work; frames agree with the stepped render to floating-point rounding.
+
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Tuple
+
+from FireworkBenchmark import load_entry_point
+
+ENTRY_POINT = "FireworkV3.5"
+TAIL = 4.0  # seconds rendered after the last launch so the final bursts can fade;
+
+
+def split_frames(frames: int, chunks: int) -> List[Tuple[int, int]]:
+    chunks = max(1, min(chunks, frames))
+    bounds = [frames * i // chunks for i in range(chunks + 1)]
+    return [(a, b) for a, b in zip(bounds, bounds[1:]) if b > a]
+
+
+def render_slice(job: Dict[str, object]) -> Dict[str, float]:
+    module = load_entry_point(ENTRY_POINT)
+    pygame = module.pygame
+    start, stop = job["start"], job["stop"]
+    width, height = job["size"]
+    sim = module.FireworksSimulation(width, height, headless=True, seed=job["seed"], pipeline_depth=0)
+    sim.set_bloom_quality(job["bloom"])
+    sim.load_show(job["script"])
+    raw = open(job["out"], "r+b") if job["format"] == "raw" else None
+    frame_bytes = width * height * 3
+    t0 = time.perf_counter()
+    first = []
+
+    def write(frame: int, buffer_surf) -> None:
+        if not first:
+            first.append(time.perf_counter())
+        if raw is not None:
+            raw.seek(frame * frame_bytes)
+            raw.write(pygame.image.tobytes(buffer_surf, "RGB"))
+        else:
+            pygame.image.save(buffer_surf, os.path.join(job["out"], f"frame_{frame:06d}.png"))
+
+    try:
+        sim.render_offline(start, stop, job["dt"], write, closed_form=job["closed_form"])
+    finally:
+        if raw is not None:
+            raw.close()
+        sim.pipeline.close()
+        pygame.quit()
+    end = time.perf_counter()
+    ready = first[0] if first else end
+    return {"start": start, "stop": stop, "fast_forward_s": ready - t0, "render_s": end - ready}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Render a firework show to numbered PNGs or raw RGB, in parallel.")
+    parser.add_argument("script", help="JSON or TOML show file")
+    parser.add_argument("--out", default="frames", help="output directory (png) or file (raw)")
+    parser.add_argument("--format", choices=["png", "raw"], default="png")
+    parser.add_argument("--seed", type=int, help="overrides the script's seed (default 0)")
+    parser.add_argument("--width", type=int)
+    parser.add_argument("--height", type=int)
+    parser.add_argument("--fps", type=float, help="frames per second; dt is 1/fps (default 60)")
+    parser.add_argument("--duration", type=float, help="seconds to render (default: last launch + 4 s)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunks", type=int, help="frame slices to split the show into (default: one per worker)")
+    parser.add_argument("--bloom", default="medium", choices=["off", "low", "medium", "high"])
+    parser.add_argument("--closed-form", action="store_true",
+                        help="evaluate sparks in closed form; workers seek to their slice without simulating")
+    args = parser.parse_args()
+
+    # Parse (and validate) the show up front; workers re-load it from the same path;
+    schedule = load_entry_point(ENTRY_POINT).LaunchScheduler.load(args.script)
+    show = schedule.meta
+    seed = args.seed if args.seed is not None else int(show.get("seed", 0))
+    width = args.width or int(show.get("width", 1600))
+    height = args.height or int(show.get("height", 900))
+    fps = args.fps or float(show.get("fps", 60))
+    dt = 1.0 / fps
+    duration = args.duration or float(show.get("duration", schedule.end_time + TAIL))
+    frames = int(round(duration * fps))
+
+    if args.format == "raw":
+        parent = os.path.dirname(os.path.abspath(args.out))
+        os.makedirs(parent, exist_ok=True)
+        # Pre-size the file so every worker can write its frames at their own offsets;
+        with open(args.out, "wb") as fh:
+            fh.truncate(frames * width * height * 3)
+    else:
+        os.makedirs(args.out, exist_ok=True)
+
+    slices = split_frames(frames, args.chunks or args.workers)
+    jobs = [
+        {"start": a, "stop": b, "seed": seed, "size": (width, height), "dt": dt, "script": os.path.abspath(args.script),
+         "out": args.out, "format": args.format, "bloom": args.bloom, "closed_form": args.closed_form}
+        for a, b in slices
+    ]
+    print(f"[render] {frames} frames {width}x{height} @ {fps:g} fps, {len(jobs)} slices on {args.workers} workers",
+          file=sys.stderr)
+    t0 = time.perf_counter()
+    # SDL state must not be inherited across fork; every worker starts a fresh interpreter;
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=max(1, args.workers), mp_context=context) as pool:
+        results = list(pool.map(render_slice, jobs))
+    elapsed = time.perf_counter() - t0
+    print(json.dumps({
+        "frames": frames,
+        "size": [width, height],
+        "fps": fps,
+        "seed": seed,
+        "format": args.format,
+        "closed_form": args.closed_form,
+        "out": args.out,
+        "elapsed_s": round(elapsed, 3),
+        "frames_per_s": round(frames / elapsed, 2) if elapsed else 0.0,
+        "slices": [{k: round(v, 3) if isinstance(v, float) else v for k, v in r.items()} for r in results],
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
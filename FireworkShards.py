@@ -0,0 +1,371 @@
+"""
+                             [ DISCLAIMER ]
+                             
+This code and its associated logic were authored by GuestAUser(Lk10). 
+Any use, distribution, or modification of this code MUST include proper credit to the original author. 
+Failure to attribute the original author is a violation of intellectual property rights. 
+By using this code, you agree to comply with these terms.
+
+Thank you for respecting the work of the original creator.
+
+[TIMESTAMP OF PROJECT] (10/18/2026)
+"""
+
+# Multi-process particle integration over shared-memory buffers.
+#
+# The particle arrays of a ParticleStore live in one multiprocessing.shared_memory
+# block. Each simulation step the main process writes dt, the live count and one
+# [start, stop) slice per worker into a small control block, and a barrier releases
+# the workers; they integrate their slices in place and meet at the barrier again.
+# At the end of the step the workers also retire off-screen sparks and compact their
+# slices; the main process only adds up the counts and rebuilds the batch ranges.
+# Slices are cut at spawn-batch boundaries, so each firework's sparks stay on one
+# worker. This module only needs NumPy, so workers start without pygame.
+#
+# Scaling benchmark (full steps with dying and respawning sparks, per worker count):
+#
+#     python FireworkShards.py --particles 100000 1000000 --workers 0 1 2 4 8
+
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import threading
+import time
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# (name, per-particle shape, dtype) in block order; matches ParticleStore's arrays;
+FIELDS = (
+    ("pos", (2,), np.float32),
+    ("prev_pos", (2,), np.float32),
+    ("vel", (2,), np.float32),
+    ("color", (3,), np.uint8),
+    ("radius", (), np.float32),
+    ("life", (), np.float32),
+    ("drag", (), np.float32),
+    ("gravity", (), np.float32),
+    ("group", (), np.int64),
+)
+CONTROL_HEADER = 6  # command, dt, generation, capacity, viewport width and height (0 = no retirement);
+SLOT = 5  # per worker: start, stop, kept and retired (written back by the worker), compaction offset;
+CMD_EXIT, CMD_STEP, CMD_RETIRE, CMD_COMPACT = 0.0, 1.0, 2.0, 3.0
+
+
+def layout(capacity: int) -> Tuple[Dict[str, Tuple[int, tuple, type]], int]:
+    """Byte offset, shape and dtype of every field for ``capacity`` particles, plus the block size."""
+    fields = {}
+    offset = 0
+    for name, shape, dtype in FIELDS:
+        offset = (offset + 63) & ~63
+        full = (capacity,) + shape
+        fields[name] = (offset, full, dtype)
+        offset += int(np.prod(full)) * np.dtype(dtype).itemsize
+    return fields, max(offset, 1)
+
+
+def views(buf, capacity: int) -> Dict[str, np.ndarray]:
+    fields, _ = layout(capacity)
+    return {name: np.ndarray(shape, dtype=dtype, buffer=buf, offset=offset) for name, (offset, shape, dtype) in fields.items()}
+
+
+def integrate_slice(arrays: Dict[str, np.ndarray], a: int, b: int, dt: float) -> None:
+    # Same operations, in the same order and precision, as ParticleStore.integrate;
+    if b <= a:
+        return
+    step = dt * 60
+    arrays["prev_pos"][a:b] = arrays["pos"][a:b]
+    vel = arrays["vel"][a:b]
+    vel *= (arrays["drag"][a:b] if step == 1 else arrays["drag"][a:b] ** step)[:, None]
+    vel[:, 1] += arrays["gravity"][a:b] * step
+    arrays["pos"][a:b] += vel * step
+    arrays["life"][a:b] -= dt
+
+
+def offscreen(pos: np.ndarray, vel: np.ndarray, radius, gravity, width: float, height: float) -> np.ndarray:
+    # Same test as ParticleStore.offscreen;
+    margin = radius * 2.5
+    gone = (pos[:, 1] - margin > height) & (vel[:, 1] >= 0) & (np.asarray(gravity) >= 0)
+    gone |= (pos[:, 0] + margin < 0) & (vel[:, 0] <= 0)
+    gone |= (pos[:, 0] - margin > width) & (vel[:, 0] >= 0)
+    return gone
+
+
+def retire_slice(arrays: Dict[str, np.ndarray], a: int, b: int, width: float, height: float) -> Tuple[np.ndarray, int]:
+    """Retire the slice's off-screen sparks (when a viewport is given); returns the live rows and how many retired."""
+    life = arrays["life"][a:b]
+    retired = 0
+    if width > 0 and b > a:
+        gone = offscreen(arrays["pos"][a:b], arrays["vel"][a:b], arrays["radius"][a:b], arrays["gravity"][a:b], width, height)
+        gone &= life > 0
+        retired = int(np.count_nonzero(gone))
+        if retired:
+            life[gone] = 0.0
+    return np.flatnonzero(life > 0), retired
+
+
+def block_name(prefix: str, generation: int) -> str:
+    return f"{prefix}-{generation}"
+
+
+def _worker(prefix: str, control_name: str, index: int, barrier) -> None:
+    control = shared_memory.SharedMemory(name=control_name)
+    ctl = np.ndarray((control.size // 8,), dtype=np.float64, buffer=control.buf)
+    generation = -1
+    block: Optional[shared_memory.SharedMemory] = None
+    arrays: Dict[str, np.ndarray] = {}
+    try:
+        while True:
+            barrier.wait()
+            if ctl[0] == CMD_EXIT:
+                break
+            if int(ctl[2]) != generation:
+                arrays = {}
+                if block is not None:
+                    block.close()
+                generation = int(ctl[2])
+                block = shared_memory.SharedMemory(name=block_name(prefix, generation))
+                arrays = views(block.buf, int(ctl[3]))
+            base = CONTROL_HEADER + SLOT * index
+            a, b = int(ctl[base]), int(ctl[base + 1])
+            if ctl[0] == CMD_STEP:
+                integrate_slice(arrays, a, b, float(ctl[1]))
+            elif ctl[0] == CMD_RETIRE:
+                keep, retired = retire_slice(arrays, a, b, ctl[4], ctl[5])
+                ctl[base + 2] = len(keep)
+                ctl[base + 3] = retired
+            elif ctl[0] == CMD_COMPACT:
+                dest = int(ctl[base + 4])
+                # A shard's new rows can land on its left neighbour's old ones, so every shard reads first;
+                rows = {name: arr[a:b][keep] for name, arr in arrays.items()} if dest != a or len(keep) != b - a else None
+                barrier.wait()
+                if rows is not None:
+                    for name, arr in arrays.items():
+                        arr[dest:dest + len(keep)] = rows[name]
+                    rows = None
+            barrier.wait()
+    except threading.BrokenBarrierError:
+        pass
+    finally:
+        arrays = {}
+        ctl = None
+        if block is not None:
+            block.close()
+        control.close()
+
+
+class ShardPool:
+    """Worker processes that integrate, retire and compact slices of a shared particle block in lock step."""
+
+    def __init__(self, workers: int, timeout: float = 10.0):
+        self.workers = max(1, workers)
+        self.timeout = timeout
+        self.prefix = f"fw{os.getpid()}x{id(self) & 0xFFFFFF:x}"
+        self.generation = -1
+        self.capacity = 0
+        self.steps = 0
+        self.wait_time = 0.0
+        self._block: Optional[shared_memory.SharedMemory] = None
+        self._retired: List[shared_memory.SharedMemory] = []
+        self._control = shared_memory.SharedMemory(create=True, size=8 * (CONTROL_HEADER + SLOT * self.workers))
+        self._ctl = np.ndarray((CONTROL_HEADER + SLOT * self.workers,), dtype=np.float64, buffer=self._control.buf)
+        self._ctl[:] = 0
+        # Workers start in fresh interpreters: nothing from the parent's SDL/pygame state is inherited;
+        context = multiprocessing.get_context("spawn")
+        self._barrier = context.Barrier(self.workers + 1)
+        self._procs = [
+            context.Process(target=_worker, args=(self.prefix, self._control.name, i, self._barrier), daemon=True)
+            for i in range(self.workers)
+        ]
+        for proc in self._procs:
+            proc.start()
+
+    def allocate(self, capacity: int, old: Optional[Dict[str, np.ndarray]] = None, count: int = 0) -> Dict[str, np.ndarray]:
+        """A new shared block for ``capacity`` particles, with the first ``count`` rows of ``old`` copied in."""
+        _, size = layout(capacity)
+        generation = self.generation + 1
+        block = shared_memory.SharedMemory(name=block_name(self.prefix, generation), create=True, size=size)
+        arrays = views(block.buf, capacity)
+        for name, arr in arrays.items():
+            arr[:count] = old[name][:count] if old is not None else 0
+        if self._block is not None:
+            # Workers still map the old block until their next step; unlinking only drops the name;
+            self._block.unlink()
+            self._retired.append(self._block)
+        self._block = block
+        self.generation = generation
+        self.capacity = capacity
+        return arrays
+
+    @staticmethod
+    def cuts(group: np.ndarray, workers: int) -> List[int]:
+        """Slice boundaries for ``workers`` shards of ``group`` (length n), snapped to batch starts."""
+        n = len(group)
+        if not n:
+            return [0] * (workers + 1)
+        starts = np.flatnonzero(np.concatenate(([True], group[1:] != group[:-1])))
+        targets = np.arange(1, workers) * n // workers
+        inner = np.append(starts, n)[np.searchsorted(starts, targets)]
+        return [0] + inner.tolist() + [n]
+
+    def _command(self, command: float, bounds: Optional[Sequence[int]] = None, waits: int = 2) -> None:
+        ctl = self._ctl
+        ctl[0] = command
+        ctl[2] = self.generation
+        ctl[3] = self.capacity
+        if bounds is not None:
+            slots = ctl[CONTROL_HEADER:].reshape(self.workers, SLOT)
+            slots[:, 0] = bounds[:-1]
+            slots[:, 1] = bounds[1:]
+        t0 = time.perf_counter()
+        for _ in range(waits):
+            self._barrier.wait(self.timeout)
+        self.wait_time += time.perf_counter() - t0
+
+    def step(self, bounds: Sequence[int], dt: float) -> None:
+        self._ctl[1] = dt
+        self._command(CMD_STEP, bounds)
+        self.steps += 1
+        self._close_retired()
+
+    def cull(self, bounds: Sequence[int], width: float = 0, height: float = 0) -> Tuple[int, int]:
+        """Retire (given a viewport) and drop dead sparks shard by shard; returns the live count and how many retired."""
+        ctl = self._ctl
+        ctl[4] = width
+        ctl[5] = height
+        self._command(CMD_RETIRE, bounds)
+        slots = ctl[CONTROL_HEADER:].reshape(self.workers, SLOT)
+        kept = slots[:, 2].astype(np.int64)
+        count = int(kept.sum())
+        retired = int(slots[:, 3].sum())
+        if count < bounds[-1]:
+            # Shards keep their order, so each one's live rows go right after the previous shard's;
+            slots[:, 4] = np.cumsum(kept) - kept
+            self._command(CMD_COMPACT, waits=3)
+        return count, retired
+
+    def _close_retired(self) -> None:
+        # A block can only be closed once no NumPy view of it is left in this process;
+        still_mapped = []
+        for block in self._retired:
+            try:
+                block.close()
+            except BufferError:
+                still_mapped.append(block)
+        self._retired = still_mapped
+
+    def close(self) -> None:
+        if self._control is None:
+            return
+        self._ctl[0] = CMD_EXIT
+        try:
+            self._barrier.wait(self.timeout)
+        except Exception:
+            self._barrier.abort()
+        for proc in self._procs:
+            proc.join(self.timeout)
+            if proc.is_alive():
+                proc.terminate()
+        self._ctl = None
+        self._control.close()
+        self._control.unlink()
+        self._control = None
+        if self._block is not None:
+            self._block.unlink()
+            self._retired.append(self._block)
+            self._block = None
+        self._close_retired()
+
+
+def benchmark(particles: int, workers: int, steps: int, batch: int, dt: float = 1 / 60,
+              width: int = 1600, height: int = 900) -> Dict[str, float]:
+    """Full steps over ``particles`` sparks in batches of ``batch``: integrate, retire, compact, respawn the dead.
+
+    0 workers runs every phase in-process, as ParticleStore does.
+    """
+    rng = np.random.default_rng(0)
+    pool = ShardPool(workers) if workers else None
+    next_group = 0
+
+    def respawn(a: int) -> None:
+        # Bursts like the simulation's: on screen, 0.5-2.5 s lifetimes, so sparks die and retire every step;
+        nonlocal next_group
+        n = particles - a
+        arrays["pos"][a:] = rng.uniform((0, 0), (width, height), (n, 2))
+        arrays["prev_pos"][a:] = arrays["pos"][a:]
+        arrays["vel"][a:] = rng.uniform(-5, 5, (n, 2))
+        arrays["color"][a:] = (255, 180, 60)
+        arrays["radius"][a:] = 3.0
+        arrays["life"][a:] = rng.uniform(0.5, 2.5, n)
+        arrays["drag"][a:] = 0.96
+        arrays["gravity"][a:] = 0.1
+        arrays["group"][a:] = next_group + np.arange(n) // batch
+        next_group += -(-n // batch)
+
+    try:
+        arrays = pool.allocate(particles) if pool else {
+            name: np.zeros((particles,) + shape, dtype=dtype) for name, shape, dtype in FIELDS
+        }
+        respawn(0)
+        arrays["life"][:] *= rng.uniform(0, 1, particles)  # start at steady state rather than all at once;
+        if pool:
+            pool.step(ShardPool.cuts(arrays["group"], workers), 0.0)  # a zero step attaches the workers;
+        count = particles
+        died = 0
+        t0 = time.perf_counter()
+        waited = pool.wait_time if pool else 0.0
+        for _ in range(steps):
+            if pool:
+                bounds = ShardPool.cuts(arrays["group"][:count], workers)
+                pool.step(bounds, dt)
+                count, _ = pool.cull(bounds, width, height)
+            else:
+                integrate_slice(arrays, 0, count, dt)
+                keep, _ = retire_slice(arrays, 0, count, width, height)
+                if len(keep) < count:
+                    for arr in arrays.values():
+                        arr[:len(keep)] = arr[keep]
+                count = len(keep)
+            # The batch starts the main process rebuilds its ranges from;
+            g = arrays["group"][:count]
+            np.flatnonzero(g[1:] != g[:-1])
+            died += particles - count
+            respawn(count)
+            count = particles
+        elapsed = time.perf_counter() - t0
+        main_time = elapsed - ((pool.wait_time - waited) if pool else 0.0)
+        arrays = None
+    finally:
+        if pool:
+            pool.close()
+    return {
+        "particles": particles,
+        "workers": workers,
+        "step_ms": round(elapsed / steps * 1000.0, 4),
+        "main_process_ms": round(main_time / steps * 1000.0, 4),
+        "died_per_step": round(died / steps, 1),
+        "mparticles_per_s": round(particles * steps / elapsed / 1e6, 2),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Scaling benchmark for sharded particle steps.")
+    parser.add_argument("--particles", nargs="+", type=int, default=[100000, 1000000])
+    parser.add_argument("--workers", nargs="+", type=int, default=[0, 1, 2, 4, 8],
+                        help="worker counts to compare; 0 steps in-process")
+    parser.add_argument("--steps", type=int, default=200)
+    parser.add_argument("--batch", type=int, default=60, help="sparks per spawn batch (shards are cut between batches)")
+    args = parser.parse_args()
+    results = []
+    for particles in args.particles:
+        for workers in args.workers:
+            print(f"[shards] particles={particles} workers={workers}", file=sys.stderr)
+            results.append(benchmark(particles, workers, args.steps, args.batch))
+    print(json.dumps({"cpus": os.cpu_count(), "steps": args.steps, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -11,186 +11,1059 @@ Thank you for respecting the work of the original creator.
 [TIMESTAMP OF PROJECT] (02/02/2025)
 """
 
+import abc
+import argparse
 import asyncio
+import csv
+import functools
+import heapq
+import hashlib
+import json
 import math
+import os
 import random
+import struct
+import sys
 import time
 import threading
-from typing import List, Optional, Tuple
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Callable, Deque, Dict, List, NamedTuple, Optional, Tuple
 
 import numpy as np
 import pygame
 import pygame_gui
 from pygame.math import Vector2
 
-pygame.init()
+try:
+    import tomllib
+except ImportError:  # Python < 3.11; JSON shows still work;
+    tomllib = None
 
-def get_all_ui_elements(container) -> List[pygame_gui.core.UIElement]:
-    elements = []
-    if hasattr(container, "get_children"):
-        for child in container.get_children():
-            elements.append(child)
-            elements.extend(get_all_ui_elements(child))
-    return elements
+class UIHitIndex:
+    """Grid index of visible pygame_gui element rects, rebuilt only when the UI or its layout changes."""
 
-class Particle:
-    _glow_cache: dict = {}
+    UI_EVENTS = frozenset(
+        value for name, value in vars(pygame_gui).items() if name.startswith("UI_") and isinstance(value, int)
+    )
+    LAYOUT_EVENTS = frozenset((pygame.MOUSEBUTTONUP, pygame.VIDEORESIZE, pygame.WINDOWRESIZED))
 
-    def __init__(self, pos: Tuple[float, float], vel: Tuple[float, float], color: Tuple[int, int, int],
-                 radius: float, life: float, drag: float = 0.96, gravity: float = 0.1):
-        self.pos = Vector2(pos)
-        self.vel = Vector2(vel)
-        self.color = color
-        self.radius = radius
+    def __init__(self, manager: pygame_gui.UIManager, cell_size: int = 64):
+        self.manager = manager
+        self.cell_size = cell_size
+        self.rebuilds = 0
+        self._cells: Dict[Tuple[int, int], List[pygame.Rect]] = {}
+        self._signature: Optional[int] = None
+        self._dirty = True
+
+    def invalidate(self) -> None:
+        self._dirty = True
+
+    def process_event(self, event: pygame.event.Event) -> None:
+        if event.type in self.UI_EVENTS or event.type in self.LAYOUT_EVENTS:
+            self._dirty = True
+
+    def _rebuild(self, signature: int) -> None:
+        cells: Dict[Tuple[int, int], List[pygame.Rect]] = {}
+        size = self.cell_size
+        for element in self.manager.get_sprite_group().sprites():
+            if not element.visible or isinstance(element, pygame_gui.core.UIContainer):
+                continue
+            rect = pygame.Rect(element.rect)
+            for cx in range(rect.left // size, (rect.right - 1) // size + 1):
+                for cy in range(rect.top // size, (rect.bottom - 1) // size + 1):
+                    cells.setdefault((cx, cy), []).append(rect)
+        self._cells = cells
+        self._signature = signature
+        self._dirty = False
+        self.rebuilds += 1
+
+    def hit(self, pos: Tuple[int, int]) -> bool:
+        # A changed sprite count means elements were created or killed (a dropdown opening, a dialog closing);
+        signature = len(self.manager.get_sprite_group().spritedict)
+        if self._dirty or signature != self._signature:
+            self._rebuild(signature)
+        rects = self._cells.get((pos[0] // self.cell_size, pos[1] // self.cell_size))
+        if not rects:
+            return False
+        for rect in rects:
+            if rect.collidepoint(pos):
+                return True
+        return False
+
+
+class AssetCache:
+    """Generated arrays cached on disk as ``.npy``, keyed by name, resolution and seed; hits are memory-mapped."""
+
+    VERSION = 2
+
+    def __init__(self, directory: Optional[str] = None, enabled: bool = True):
+        self.directory = directory or os.environ.get(
+            "FIREWORKS_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "fireworks")
+        )
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+
+    def path(self, name: str, size: Optional[Tuple[int, int]] = None, seed: Optional[int] = None) -> str:
+        parts = [name]
+        if size is not None:
+            parts.append(f"{size[0]}x{size[1]}")
+        if seed is not None:
+            parts.append(f"s{seed}")
+        parts.append(f"v{self.VERSION}")
+        return os.path.join(self.directory, "-".join(parts) + ".npy")
+
+    def load(self, name: str, size: Optional[Tuple[int, int]] = None, seed: Optional[int] = None) -> Optional[np.ndarray]:
+        if not self.enabled:
+            return None
+        try:
+            array = np.load(self.path(name, size, seed), mmap_mode="r")
+        except (OSError, ValueError):
+            return None
+        self.hits += 1
+        return array
+
+    def save(self, name: str, array: np.ndarray, size: Optional[Tuple[int, int]] = None, seed: Optional[int] = None) -> None:
+        if not self.enabled:
+            return
+        path = self.path(name, size, seed)
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            tmp = f"{path}.{os.getpid()}.tmp"
+            with open(tmp, "wb") as fh:
+                np.save(fh, np.ascontiguousarray(array))
+            os.replace(tmp, path)
+        except OSError:
+            pass
+
+    def load_or_build(self, name: str, size: Optional[Tuple[int, int]], seed: Optional[int],
+                      build: Callable[[], np.ndarray]) -> np.ndarray:
+        array = self.load(name, size, seed)
+        if array is None:
+            self.misses += 1
+            array = build()
+            self.save(name, array, size, seed)
+        return array
+
+
+class GlowCache:
+    """LRU cache of pre-rendered glow sprites bounded by pixel memory, keyed on a ``color_step`` palette grid."""
+
+    def __init__(self, max_bytes: int = 8 * 1024 * 1024, color_step: int = 8):
+        self.max_bytes = max_bytes
+        self.color_step = max(1, int(color_step))
+        self._entries: "OrderedDict[Tuple[int, int, Tuple[int, int, int]], pygame.Surface]" = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def quantize(self, color: Tuple[int, int, int]) -> Tuple[int, int, int]:
+        step = self.color_step
+        if step == 1:
+            return color
+        return tuple(min(255, int(round(c / step)) * step) for c in color)
+
+    def quantize_array(self, rgb: np.ndarray) -> np.ndarray:
+        if self.color_step == 1:
+            return rgb
+        step = self.color_step
+        return np.minimum(255, np.rint(rgb / step) * step).astype(np.uint8)
+
+    def get(self, base_size: int, radius: int, color: Tuple[int, int, int]) -> pygame.Surface:
+        key = (base_size, radius, self.quantize(color))
+        glow = self._entries.get(key)
+        if glow is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return glow
+        self.misses += 1
+        glow = self._render(base_size, radius, key[2])
+        self._entries[key] = glow
+        self.bytes += glow.get_pitch() * glow.get_height()
+        self._trim()
+        return glow
+
+    def _trim(self) -> None:
+        while self.bytes > self.max_bytes and len(self._entries) > 1:
+            _, old = self._entries.popitem(last=False)
+            self.bytes -= old.get_pitch() * old.get_height()
+            self.evictions += 1
+
+    @staticmethod
+    def _render(base_size: int, radius: int, color: Tuple[int, int, int]) -> pygame.Surface:
+        glow = pygame.Surface((base_size, base_size), pygame.SRCALPHA)
+        for i in range(4):
+            r = max(0, radius + 3 - i * 2)
+            a = max(0, 120 - i * 28)
+            pygame.draw.circle(glow, (*color, a), (base_size // 2, base_size // 2), r)
+        return glow
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.bytes = 0
+
+    def export_arrays(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Pack every cached sprite into (keys[m, 5], rgba[m, s, s, 4]) for on-disk storage."""
+        keys = np.array([(b, r, *c) for b, r, c in self._entries], dtype=np.int16).reshape(-1, 5)
+        side = int(keys[:, 0].max()) if len(keys) else 0
+        pixels = np.zeros((len(keys), side, side, 4), dtype=np.uint8)
+        for i, ((b, _, _), glow) in enumerate(self._entries.items()):
+            pixels[i, :b, :b, :3] = pygame.surfarray.pixels3d(glow).transpose(1, 0, 2)
+            pixels[i, :b, :b, 3] = pygame.surfarray.pixels_alpha(glow).T
+        return keys, pixels
+
+    def import_arrays(self, keys: np.ndarray, pixels: np.ndarray) -> None:
+        for (b, r, cr, cg, cb), block in zip(keys.tolist(), pixels):
+            key = (b, r, (cr, cg, cb))
+            if key in self._entries:
+                continue
+            glow = pygame.image.frombuffer(np.ascontiguousarray(block[:b, :b]), (b, b), "RGBA").copy()
+            self._entries[key] = glow
+            self.bytes += glow.get_pitch() * glow.get_height()
+        self._trim()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "entries": len(self._entries),
+            "bytes": self.bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+class RandomBlocks:
+    """Seeded random numbers for one simulation, sliced off pre-generated NumPy blocks."""
+
+    def __init__(self, seed=None, block: int = 4096):
+        self.seed_seq = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+        self.generator = np.random.Generator(np.random.PCG64(self.seed_seq))
+        self.block = block
+        self.refills = 0
+        fill = self.generator
+        self._fill = {"uniform": fill.random, "exponential": fill.standard_exponential}
+        self._blocks = {kind: np.zeros(0) for kind in self._fill}
+        self._offsets = {kind: 0 for kind in self._fill}
+
+    def spawn(self, count: int) -> List["RandomBlocks"]:
+        return [RandomBlocks(child, self.block) for child in self.seed_seq.spawn(count)]
+
+    def _take(self, kind: str, n: int) -> np.ndarray:
+        block, offset = self._blocks[kind], self._offsets[kind]
+        if offset + n > len(block):
+            # Keep the unused tail so the stream does not depend on how draws were batched;
+            block = np.concatenate([block[offset:], self._fill[kind](max(self.block, n))])
+            block.flags.writeable = False
+            self._blocks[kind] = block
+            offset = 0
+            self.refills += 1
+        self._offsets[kind] = offset + n
+        return block[offset:offset + n]
+
+    def _draw(self, kind: str, size):
+        if size is None:
+            return float(self._take(kind, 1)[0])
+        n = int(np.prod(size))
+        return self._take(kind, n).reshape(size)
+
+    def random(self, size=None):
+        return self._draw("uniform", size)
+
+    def uniform(self, low=0.0, high=1.0, size=None):
+        if size is None and np.ndim(low) + np.ndim(high):
+            size = np.broadcast(low, high).shape
+        u = self._draw("uniform", size)
+        return low + (np.subtract(high, low)) * u
+
+    def randint(self, low, high=None, size=None):
+        """Integers in [low, high), like ``RandomState.randint``."""
+        if high is None:
+            low, high = 0, low
+        u = self._draw("uniform", size)
+        # Floor, not truncation toward zero, so negative ranges stay uniform;
+        if size is None:
+            return math.floor(low + (high - low) * u)
+        return np.floor(low + (high - low) * u).astype(np.int64)
+
+    def exponential(self, scale=1.0, size=None):
+        return scale * self._draw("exponential", size)
+
+
+class ParticleRange:
+    """Contiguous slice [start, stop) of the particle store owned by one spawn batch."""
+
+    __slots__ = ("start", "stop")
+
+    def __init__(self, start: int = 0, stop: int = 0):
+        self.start = start
+        self.stop = stop
+
+    def __len__(self) -> int:
+        return self.stop - self.start
+
+
+class SplatRenderer:
+    """Spark renderer: glow kernels scatter-added into a float HDR buffer, tone-mapped and uploaded once."""
+
+    EDGE_BUDGET = 1 << 22  # edge entries per bincount, bounds the temporary index/weight arrays;
+
+    def __init__(self, knee: float = 0.75, headroom: float = 4.0, lut_size: int = 4096):
+        self.knee = knee
+        self.headroom = headroom
+        self._kernels: Dict[Tuple[int, int], Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]] = {}
+        self._scratch: Optional[pygame.Surface] = None
+        # Overlaps add up past 255; the LUT rolls them off above ``knee`` instead of clipping;
+        x = np.linspace(0.0, headroom, lut_size)
+        shoulder = knee + (1.0 - knee) * (1.0 - np.exp(-(x - knee) / (1.0 - knee))) if knee < 1.0 else x
+        self.lut = np.round(255.0 * np.minimum(1.0, np.where(x < knee, x, shoulder))).astype(np.uint8)
+        self._scale = (lut_size - 1) / (255.0 * headroom)
+
+    def kernel(self, base: int, radius: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """Runs ``(dy, x_start, x_stop, weight)`` covering a glow sprite, weights in [0, 1]."""
+        key = (base, radius)
+        runs = self._kernels.get(key)
+        if runs is None:
+            probe = pygame.Surface((base, base), pygame.SRCALPHA)
+            probe.fill((0, 0, 0))
+            probe.blit(GlowCache._render(base, radius, (255, 255, 255)), (0, 0), special_flags=pygame.BLEND_ADD)
+            weights = pygame.surfarray.array3d(probe)[:, :, 0].astype(np.float64) / 255.0
+            found = []
+            for dy in range(base):
+                column = weights[:, dy]
+                x = 0
+                while x < base:
+                    stop = x + 1
+                    while stop < base and column[stop] == column[x]:
+                        stop += 1
+                    if column[x]:
+                        found.append((dy, x, stop, column[x]))
+                    x = stop
+            dy, start, stop, w = (np.array(v) for v in zip(*found))
+            runs = self._kernels[key] = (dy.astype(np.int64), start.astype(np.int64), stop.astype(np.int64), w)
+        return runs
+
+    def draw(self, surf: pygame.Surface, base: np.ndarray, radius: np.ndarray, xy: np.ndarray, color: np.ndarray) -> None:
+        if not len(base):
+            return
+        width, height = surf.get_size()
+        # Accumulate over the sparks' unclipped extent (plus one column for run ends)
+        # so no edge needs a bounds check; the buffer is cropped to the screen on upload;
+        ox, oy = int(xy[:, 0].min()), int(xy[:, 1].min())
+        bw = int((xy[:, 0] + base).max()) - ox
+        bh = int((xy[:, 1] + base).max()) - oy
+        x0, y0 = max(0, ox), max(0, oy)
+        x1, y1 = min(width, ox + bw), min(height, oy + bh)
+        if x1 <= x0 or y1 <= y0:
+            return
+        # Flat index of (x, y, channel) in an x-major, channel-interleaved buffer;
+        origin = ((xy[:, 0].astype(np.int64) - ox) * bh + (xy[:, 1] - oy)) * 3
+        acc = np.zeros((bw + 1) * bh * 3, dtype=np.float64)
+        channels = np.arange(3)
+        # A handful of (size, radius) pairs cover every spark; find them without sorting;
+        span = int(radius.max()) + 1
+        key = base.astype(np.int64) * span + radius
+        for k in np.flatnonzero(np.bincount(key)).tolist():
+            b, r = divmod(k, span)
+            dy, start, stop, w = self.kernel(b, r)
+            offsets = (np.concatenate([start * bh + dy, stop * bh + dy])[:, None] * 3 + channels).ravel()
+            signed = np.concatenate([w, -w])[None, :, None]
+            sel = np.flatnonzero(key == k)
+            chunk = max(1, self.EDGE_BUDGET // len(offsets))
+            for lo in range(0, len(sel), chunk):
+                part = sel[lo:lo + chunk]
+                edges = (origin[part, None] + offsets).ravel()
+                weights = (color[part, None, :] * signed).ravel()
+                # Only the span this chunk touches, not a full-screen array per chunk;
+                e0 = int(edges.min())
+                e1 = int(edges.max()) + 1
+                acc[e0:e1] += np.bincount(edges - e0, weights=weights, minlength=e1 - e0)
+        # Each run was scattered as +colour at its start and -colour at its end; summing along x fills it;
+        hdr = np.cumsum(acc.reshape(bw + 1, bh * 3), axis=0, dtype=np.float32)
+        hdr = hdr.reshape(bw + 1, bh, 3)[x0 - ox:x1 - ox, y0 - oy:y1 - oy]
+        hdr *= self._scale
+        q = hdr.astype(np.int32)
+        np.clip(q, 0, len(self.lut) - 1, out=q)
+        image = self.lut[q]
+        if self._scratch is None or self._scratch.get_size() != (width, height):
+            self._scratch = pygame.Surface((width, height))
+        area = pygame.Rect(0, 0, x1 - x0, y1 - y0)
+        pygame.surfarray.blit_array(self._scratch.subsurface(area), image)
+        surf.blit(self._scratch, (x0, y0), area=area, special_flags=pygame.BLEND_RGB_ADD)
+
+
+class ParticleStore:
+    """Structure-of-arrays storage for every live particle, kept in contiguous spawn batches."""
+
+    # Shared, bounded cache of pre-rendered glow surfaces;
+    glow_cache = GlowCache()
+    RENDER_PATHS = ("batched", "immediate", "splat")
+    FIELDS = ("pos", "prev_pos", "vel", "color", "radius", "life", "drag", "gravity", "group")
+
+    def __init__(self, capacity: int = 4096):
+        self.capacity = 0
+        self.count = 0
+        self.pos = np.zeros((0, 2), dtype=np.float32)
+        self.prev_pos = np.zeros((0, 2), dtype=np.float32)
+        self.vel = np.zeros((0, 2), dtype=np.float32)
+        self.color = np.zeros((0, 3), dtype=np.uint8)
+        self.radius = np.zeros(0, dtype=np.float32)
+        self.life = np.zeros(0, dtype=np.float32)
+        self.drag = np.zeros(0, dtype=np.float32)
+        self.gravity = np.zeros(0, dtype=np.float32)
+        self.group = np.zeros(0, dtype=np.int64)
+        self._ranges: Dict[int, ParticleRange] = {}
+        self._next_group = 0
+        # Batches drawn into the trail buffer instead of straight onto the frame;
+        self.trail_groups: set = set()
+        self.render_path = "batched"
+        self.splat = SplatRenderer()
+        # Viewport stats: sparks/batches skipped by the last draw, sparks retired early in total;
+        self.culled = 0
+        self.groups_culled = 0
+        self.retired = 0
+        self._reserve(capacity)
+
+    def _arrays(self) -> Tuple[np.ndarray, ...]:
+        return tuple(getattr(self, name) for name in self.FIELDS)
+
+    def _reserve(self, needed: int) -> None:
+        if needed <= self.capacity:
+            return
+        capacity = max(needed, self.capacity * 2, 256)
+        n = self.count
+        for name in self.FIELDS:
+            old = getattr(self, name)
+            grown = np.zeros((capacity,) + old.shape[1:], dtype=old.dtype)
+            grown[:n] = old[:n]
+            setattr(self, name, grown)
+        self.capacity = capacity
+
+    def __len__(self) -> int:
+        return self.count
+
+    def spawn(self, pos, vel, color, radius, life, drag=0.96, gravity=0.1, trail=False) -> ParticleRange:
+        """Append a batch of particles; scalar or per-particle arguments broadcast over ``vel``."""
+        vel = np.asarray(vel, dtype=np.float32).reshape(-1, 2)
+        n = len(vel)
+        a = self.count
+        b = a + n
+        self._reserve(b)
+        self.pos[a:b] = np.asarray(pos, dtype=np.float32)
+        self.prev_pos[a:b] = self.pos[a:b]
+        self.vel[a:b] = vel
+        self.color[a:b] = np.clip(np.asarray(color, dtype=np.int32), 0, 255)
+        self.radius[a:b] = radius
+        self.life[a:b] = life
+        self.drag[a:b] = drag
+        self.gravity[a:b] = gravity
+        gid = self._next_group
+        self._next_group += 1
+        self.group[a:b] = gid
+        self.count = b
+        rng = ParticleRange(a, b)
+        if n:
+            self._ranges[gid] = rng
+            if trail:
+                self.trail_groups.add(gid)
+        return rng
+
+    def kill(self, rng: ParticleRange) -> None:
+        self.life[rng.start:rng.stop] = 0.0
+
+    def evict(self, excess: int) -> int:
+        """Kill the ``excess`` least valuable particles: shortest remaining life times brightness first."""
+        n = self.count
+        excess = min(excess, n)
+        if excess <= 0:
+            return 0
+        score = self.life[:n] * (self.color[:n].max(axis=1).astype(np.float32) + 1.0)
+        victims = np.argpartition(score, excess - 1)[:excess]
+        self.life[victims] = 0.0
+        return excess
+
+    @staticmethod
+    def offscreen(pos: np.ndarray, vel: np.ndarray, radius, gravity, width: int, height: int) -> np.ndarray:
+        """Mask of sparks that are out of view and can never come back (see retire_offscreen)."""
+        margin = radius * 2.5
+        gone = (pos[:, 1] - margin > height) & (vel[:, 1] >= 0) & (np.asarray(gravity) >= 0)
+        gone |= (pos[:, 0] + margin < 0) & (vel[:, 0] <= 0)
+        gone |= (pos[:, 0] - margin > width) & (vel[:, 0] >= 0)
+        return gone
+
+    def retire_offscreen(self, width: int, height: int) -> int:
+        """Kill sparks that can never come back into view; returns how many."""
+        n = self.count
+        if not n:
+            return 0
+        gone = self.offscreen(self.pos[:n], self.vel[:n], self.radius[:n], self.gravity[:n], width, height)
+        gone &= self.life[:n] > 0
+        retired = int(np.count_nonzero(gone))
+        if retired:
+            self.life[:n][gone] = 0.0
+            self.retired += retired
+        return retired
+
+    def visible(self, pos: np.ndarray, radius: np.ndarray, group: np.ndarray, width: int, height: int) -> Optional[np.ndarray]:
+        """Indices of sparks whose glow overlaps the viewport, or None when all of them do."""
+        n = len(pos)
+        margin = radius * 2.5
+        starts = np.flatnonzero(np.concatenate(([True], group[1:] != group[:-1])))
+        lo = pos - margin[:, None]
+        hi = pos + margin[:, None]
+        box_lo = np.minimum.reduceat(lo, starts, axis=0)
+        box_hi = np.maximum.reduceat(hi, starts, axis=0)
+        on_screen = (box_hi[:, 0] >= 0) & (box_lo[:, 0] < width) & (box_hi[:, 1] >= 0) & (box_lo[:, 1] < height)
+        self.groups_culled += len(starts) - int(np.count_nonzero(on_screen))
+        mask = np.repeat(on_screen, np.diff(np.append(starts, n)))
+        inside = (hi[:, 0] >= 0) & (lo[:, 0] < width) & (hi[:, 1] >= 0) & (lo[:, 1] < height)
+        mask &= inside
+        culled = n - int(np.count_nonzero(mask))
+        self.culled += culled
+        return None if not culled else np.flatnonzero(mask)
+
+    def integrate(self, dt: float) -> None:
+        n = self.count
+        if not n:
+            return
+        step = dt * 60
+        self.prev_pos[:n] = self.pos[:n]
+        vel = self.vel[:n]
+        # Drag is per 1/60 s like gravity, so the physics rate changes sampling, not the trajectories;
+        vel *= (self.drag[:n] if step == 1 else self.drag[:n] ** step)[:, None]
+        vel[:, 1] += self.gravity[:n] * step
+        self.pos[:n] += vel * step
+        self.life[:n] -= dt
+
+    def cull(self, width: Optional[int] = None, height: Optional[int] = None) -> None:
+        """Drop dead sparks, retiring the ones that left a ``width`` x ``height`` viewport first when given."""
+        if width is not None:
+            self.retire_offscreen(width, height)
+        n = self.count
+        if not n:
+            return
+        alive = self.life[:n] > 0
+        if alive.all():
+            return
+        keep = np.flatnonzero(alive)
+        k = len(keep)
+        for arr in self._arrays():
+            arr[:k] = arr[keep]
+        self._rebuild_ranges(k)
+
+    def _rebuild_ranges(self, k: int) -> None:
+        # Re-derive every batch's range after the arrays were compacted to ``k`` rows;
+        self.count = k
+        live: Dict[int, ParticleRange] = {}
+        if k:
+            g = self.group[:k]
+            starts = np.flatnonzero(np.concatenate(([True], g[1:] != g[:-1])))
+            stops = np.append(starts[1:], k)
+            for gid, a, b in zip(g[starts].tolist(), starts.tolist(), stops.tolist()):
+                rng = self._ranges[gid]
+                rng.start = a
+                rng.stop = b
+                live[gid] = rng
+        for gid, rng in self._ranges.items():
+            if gid not in live:
+                rng.start = rng.stop = 0
+        self._ranges = live
+        if self.trail_groups:
+            self.trail_groups.intersection_update(live)
+
+    def clear(self) -> None:
+        for rng in self._ranges.values():
+            rng.start = rng.stop = 0
+        self._ranges = {}
+        self.trail_groups.clear()
+        self.count = 0
+
+    def assign(self, pos: np.ndarray, prev_pos: np.ndarray, color: np.ndarray, radius: np.ndarray,
+               life: np.ndarray, group: np.ndarray, trail_groups=()) -> None:
+        """Replace the whole store with externally evaluated sparks (see ShowTimeline); nothing is integrated."""
+        self.clear()
+        n = len(pos)
+        self._reserve(n)
+        self.pos[:n] = pos
+        self.prev_pos[:n] = prev_pos
+        self.vel[:n] = 0.0
+        self.color[:n] = color
+        self.radius[:n] = radius
+        self.life[:n] = life
+        self.drag[:n] = 1.0
+        self.gravity[:n] = 0.0
+        self.group[:n] = group
+        self.trail_groups.update(trail_groups)
+        self.count = n
+
+    def close(self) -> None:
+        pass
+
+    def interpolated(self, alpha: float = 1.0) -> np.ndarray:
+        """Positions blended between the previous and current step (``alpha`` in [0, 1])."""
+        n = self.count
+        if alpha >= 1.0:
+            return self.pos[:n]
+        prev = self.prev_pos[:n]
+        return prev + (self.pos[:n] - prev) * np.float32(alpha)
+
+    def draw(self, surf: pygame.Surface, render_path: Optional[str] = None, alpha: float = 1.0,
+             trail_surf: Optional[pygame.Surface] = None) -> None:
+        """Draw every spark onto ``surf``; sparks of trail batches go to ``trail_surf`` when one is given."""
+        self.culled = self.groups_culled = 0
+        draw = {"immediate": self._draw_immediate, "splat": self._draw_splat}.get(render_path or self.render_path, self._draw_batched)
+        if trail_surf is None or not self.trail_groups:
+            draw(surf, alpha)
+            return
+        trail = np.isin(self.group[:self.count], np.fromiter(self.trail_groups, dtype=np.int64))
+        draw(surf, alpha, np.flatnonzero(~trail))
+        draw(trail_surf, alpha, np.flatnonzero(trail))
+
+    def draw_trails(self, trail_surf: pygame.Surface, render_path: Optional[str] = None, alpha: float = 1.0) -> None:
+        """Draw only the sparks of trail batches, as ``draw`` would send them to ``trail_surf``."""
+        if not self.trail_groups:
+            return
+        draw = {"immediate": self._draw_immediate, "splat": self._draw_splat}.get(render_path or self.render_path, self._draw_batched)
+        trail = np.isin(self.group[:self.count], np.fromiter(self.trail_groups, dtype=np.int64))
+        draw(trail_surf, alpha, np.flatnonzero(trail))
+
+    def _sprite_keys(self, surf: pygame.Surface, alpha: float,
+                     subset: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        n = self.count
+        pos = self.interpolated(alpha)
+        radius = self.radius[:n]
+        color = self.color[:n]
+        group = self.group[:n]
+        if subset is not None:
+            pos, radius, color, group = pos[subset], radius[subset], color[subset], group[subset]
+        idx = self.visible(pos, radius, group, *surf.get_size())
+        if idx is not None:
+            pos, radius, color = pos[idx], radius[idx], color[idx]
+        base = np.maximum(2, (radius * 5).astype(np.int32))
+        xy = (pos - (base // 2)[:, None]).astype(np.int32)
+        return base, radius.astype(np.int32), xy, color
+
+    def _draw_immediate(self, surf: pygame.Surface, alpha: float = 1.0, subset: Optional[np.ndarray] = None) -> None:
+        if not self.count or (subset is not None and not len(subset)):
+            return
+        base, radius, xy, color = self._sprite_keys(surf, alpha, subset)
+        glow_surface = self.glow_cache.get
+        blit = surf.blit
+        for (x, y), b, r, (cr, cg, cb) in zip(xy.tolist(), base.tolist(), radius.tolist(), color.tolist()):
+            blit(glow_surface(b, r, (cr, cg, cb)), (x, y), special_flags=pygame.BLEND_ADD)
+
+    def _draw_splat(self, surf: pygame.Surface, alpha: float = 1.0, subset: Optional[np.ndarray] = None) -> None:
+        if not self.count or (subset is not None and not len(subset)):
+            return
+        self.splat.draw(surf, *self._sprite_keys(surf, alpha, subset))
+
+    def _draw_batched(self, surf: pygame.Surface, alpha: float = 1.0, subset: Optional[np.ndarray] = None) -> None:
+        # Additive blending is order-independent, so sparks are regrouped by sprite and
+        # submitted in one fblits call instead of one blit per particle.
+        if not self.count or (subset is not None and not len(subset)):
+            return
+        base, radius, xy, color = self._sprite_keys(surf, alpha, subset)
+        if not len(base):
+            return
+        colors = self.glow_cache.quantize_array(color)
+        rgb = colors.astype(np.int64)
+        keys = (base.astype(np.int64) << 40) | (radius.astype(np.int64) << 24) | (rgb[:, 0] << 16) | (rgb[:, 1] << 8) | rgb[:, 2]
+        _, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+        sprites = [
+            self.glow_cache.get(b, r, (cr, cg, cb))
+            for b, r, (cr, cg, cb) in zip(base[first].tolist(), radius[first].tolist(), colors[first].tolist())
+        ]
+        inverse = inverse.ravel()
+        order = np.argsort(inverse, kind="stable")
+        blit_sequence = [(sprites[k], dest) for k, dest in zip(inverse[order].tolist(), xy[order].tolist())]
+        if hasattr(surf, "fblits"):
+            surf.fblits(blit_sequence, pygame.BLEND_ADD)
+        else:
+            surf.blits([(glow, dest, None, pygame.BLEND_ADD) for glow, dest in blit_sequence], doreturn=False)
+
+
+class SharedParticleStore(ParticleStore):
+    """ParticleStore whose arrays live in shared memory and are integrated by worker processes."""
+
+    def __init__(self, workers: int, capacity: int = 4096):
+        from FireworkShards import ShardPool
+
+        self.pool = ShardPool(workers)
+        super().__init__(capacity)
+
+    def _reserve(self, needed: int) -> None:
+        if needed <= self.capacity:
+            return
+        capacity = max(needed, self.capacity * 2, 256)
+        old = {name: getattr(self, name) for name in self.FIELDS}
+        arrays = self.pool.allocate(capacity, old, self.count)
+        for name, arr in arrays.items():
+            setattr(self, name, arr)
+        self.capacity = capacity
+
+    def integrate(self, dt: float) -> None:
+        n = self.count
+        if not n:
+            return
+        self.pool.step(self.pool.cuts(self.group[:n], self.pool.workers), dt)
+
+    def cull(self, width: Optional[int] = None, height: Optional[int] = None) -> None:
+        n = self.count
+        if not n:
+            return
+        # Each worker retires and compacts its own shard; only the batch ranges are rebuilt here;
+        k, retired = self.pool.cull(self.pool.cuts(self.group[:n], self.pool.workers), width or 0, height or 0)
+        self.retired += retired
+        if k < n:
+            self._rebuild_ranges(k)
+
+    def close(self) -> None:
+        self.clear()
+        for name in self.FIELDS:
+            setattr(self, name, getattr(self, name)[:0].copy())
+        self.capacity = 0
+        self.pool.close()
+
+
+class ExplosionPattern(abc.ABC):
+    """An explosion shape that produces its whole spawn batch as arrays in one call."""
+
+    def __init__(self, name: str, sparks: int, speed: Tuple[float, float], life: Tuple[float, float],
+                 radius: float, drag: float = 0.96, gravity: float = 0.1, jitter: int = 0, min_sparks: int = 1,
+                 trail: bool = False):
+        self.name = name
+        self.trail = trail
+        self.sparks = sparks
+        self.speed = speed
         self.life = life
+        self.radius = radius
         self.drag = drag
         self.gravity = gravity
+        self.jitter = jitter
+        self.min_sparks = min_sparks
 
-    def update(self, dt: float):
-        self.vel *= self.drag
-        self.vel.y += self.gravity * dt * 60
-        self.pos += self.vel * dt * 60
-        self.life -= dt
+    def count(self, density: float) -> int:
+        return max(self.min_sparks, round(self.sparks * density))
+
+    @abc.abstractmethod
+    def directions(self, n: int, rng) -> np.ndarray:
+        """Unit vectors, one row per spark."""
+
+    def speeds(self, n: int, rng) -> np.ndarray:
+        lo, hi = self.speed
+        return np.full(n, lo, dtype=np.float32) if lo == hi else rng.uniform(lo, hi, n).astype(np.float32)
+
+    def spawn(self, store: ParticleStore, origin, color: Tuple[int, int, int], density: float, rng) -> ParticleRange:
+        n = self.count(density)
+        vel = self.directions(n, rng) * self.speeds(n, rng)[:, None]
+        colors = color
+        if self.jitter:
+            colors = np.minimum(255, np.asarray(color, dtype=np.int32) + rng.randint(-self.jitter, self.jitter + 1, (n, 3)))
+        life = rng.uniform(self.life[0], self.life[1], n)
+        return store.spawn(origin, vel, colors, self.radius, life, drag=self.drag, gravity=self.gravity, trail=self.trail)
+
+
+@functools.lru_cache(maxsize=None)
+def unit_directions(n: int) -> np.ndarray:
+    """``n`` evenly spaced unit vectors starting at angle 0 (read-only, shared)."""
+    a = np.arange(n) * (2 * math.pi / n)
+    table = np.stack([np.cos(a), np.sin(a)], axis=1).astype(np.float32)
+    table.flags.writeable = False
+    return table
+
+
+class BurstPattern(ExplosionPattern):
+    """Sparks in uniformly random directions."""
+
+    def directions(self, n: int, rng) -> np.ndarray:
+        a = rng.uniform(0, 2 * math.pi, n)
+        return np.stack([np.cos(a), np.sin(a)], axis=1).astype(np.float32)
+
+
+class RingPattern(ExplosionPattern):
+    """Evenly spaced sparks on a circle."""
+
+    def directions(self, n: int, rng) -> np.ndarray:
+        return unit_directions(n)
+
+
+class StarPattern(ExplosionPattern):
+    """``arms`` spokes, each carrying ``sparks // arms`` sparks at evenly stepped speeds."""
+
+    def __init__(self, name: str, arms: int, per_arm: int, max_speed: float, **kwargs):
+        super().__init__(name, arms * per_arm, (max_speed, max_speed), **kwargs)
+        self.arms = arms
+        self.per_arm = per_arm
+
+    def count(self, density: float) -> int:
+        return self.arms * max(1, round(self.per_arm * density))
+
+    def directions(self, n: int, rng) -> np.ndarray:
+        return np.repeat(unit_directions(self.arms), n // self.arms, axis=0)
+
+    def speeds(self, n: int, rng) -> np.ndarray:
+        per_arm = n // self.arms
+        steps = np.arange(1, per_arm + 1, dtype=np.float32) * (self.speed[1] / per_arm)
+        return np.tile(steps, self.arms)
+
+
+# Registered patterns, in dropdown order; register_pattern() adds new launch modes;
+PATTERNS: Dict[str, ExplosionPattern] = {}
+
+
+def register_pattern(pattern: ExplosionPattern) -> ExplosionPattern:
+    PATTERNS[pattern.name] = pattern
+    return pattern
+
+
+register_pattern(BurstPattern("burst", 60, speed=(3, 7), life=(1.5, 2.5), radius=1.3))
+register_pattern(RingPattern("ring", 36, speed=(6, 6), life=(1.2, 2.0), radius=1.2, min_sparks=4))
+register_pattern(StarPattern("star", 5, 3, 12, life=(1, 2), radius=2, drag=0.92, jitter=30))
+register_pattern(RingPattern("trail", 20, speed=(2, 4), life=(1, 2), radius=1.6, gravity=0.12, min_sparks=4, trail=True))
+SECONDARY = BurstPattern("secondary", 30, speed=(2, 5), life=(1, 2), radius=1.2, drag=0.95, jitter=60)
+
+
+class EventQueue:
+    """Time-ordered queue of per-firework events on the simulation clock; ties run in scheduling order."""
+
+    def __init__(self):
+        self.now = 0.0
+        self._heap: List[Tuple[float, int, object, str]] = []
+        self._seq = 0
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def schedule(self, t: float, target, kind: str) -> None:
+        heapq.heappush(self._heap, (t, self._seq, target, kind))
+        self._seq += 1
+
+    def next_time(self) -> Optional[float]:
+        return self._heap[0][0] if self._heap else None
+
+    def advance(self, now: float) -> List[Tuple[object, str]]:
+        """Move the clock to ``now`` and pop every ``(target, kind)`` due by then."""
+        self.now = now
+        heap = self._heap
+        fired = []
+        while heap and heap[0][0] <= now + 1e-9:
+            _, _, target, kind = heapq.heappop(heap)
+            fired.append((target, kind))
+        return fired
+
+    def clear(self) -> None:
+        self._heap = []
 
-    def draw(self, surf: pygame.Surface):
-        if self.life <= 0:
-            return
-        base_size = max(2, int(self.radius * 5))
-        cache_key = (base_size, int(self.radius), self.color)
-        if cache_key in Particle._glow_cache:
-            glow = Particle._glow_cache[cache_key]
-        else:
-            glow = pygame.Surface((base_size, base_size), pygame.SRCALPHA)
-            for i in range(4):
-                r = max(0, int(self.radius) + 3 - i * 2)
-                a = max(0, 120 - i * 28)
-                col = (
-                    max(0, min(255, int(self.color[0]))),
-                    max(0, min(255, int(self.color[1]))),
-                    max(0, min(255, int(self.color[2]))),
-                    int(a),
-                )
-                pygame.draw.circle(glow, col, (base_size // 2, base_size // 2), r)
-            Particle._glow_cache[cache_key] = glow
-        surf.blit(glow, (int(self.pos.x - base_size // 2), int(self.pos.y - base_size // 2)), special_flags=pygame.BLEND_ADD)
 
 class Firework:
-    def __init__(self, pos: Tuple[int, int], mode: str, color: Optional[Tuple[int, int, int]] = None):
+    SECONDARY_ARM = 0.8  # seconds after the main burst before a secondary can go off;
+    SECONDARY_MIN_SPARKS = 15
+    ROCKET = {"radius": 1.0, "life": 2.2, "drag": 0.96, "gravity": 0.05}
+
+    def __init__(self, store: ParticleStore, pos: Tuple[int, int], mode: str,
+                 color: Optional[Tuple[int, int, int]] = None, density: float = 1.0, secondary_chance: float = 0.02,
+                 rng: Optional[RandomBlocks] = None, events: Optional[EventQueue] = None):
+        self.store = store
+        self.rng = rng = rng if rng is not None else RandomBlocks()
+        self.events = events
+        self.density = density
+        self.secondary_chance = secondary_chance
         self.pos = Vector2(pos)
-        if color is not None:
-            self.color = tuple(max(0, min(255, int(x))) for x in color[:3])
-        else:
-            self.color = (random.randint(128, 255), random.randint(128, 255), random.randint(128, 255))
-        self.rocket = Particle(pos, (random.uniform(-2, 2), random.uniform(-22, -18)), self.color, 1.0, 2.2, drag=0.96, gravity=0.05)
+        self.color, velocity, self.secondary_delay = self.draw_launch(rng, color, secondary_chance)
+        self.rocket = store.spawn(pos, velocity, self.color, **self.ROCKET)
         self.exploded = False
-        self.particles: List[Particle] = []
+        self.particles = ParticleRange()
         self.mode = mode
-        self.secondary: List[Particle] = []
+        self.secondary = ParticleRange()
         self.second_exploded = False
-        self.exploded_at = 0
+
+    @classmethod
+    def draw_launch(cls, rng: RandomBlocks, color: Optional[Tuple[int, int, int]],
+                    secondary_chance: float) -> Tuple[Tuple[int, int, int], np.ndarray, float]:
+        """Colour, rocket velocity and secondary delay of a new firework, in stream order."""
+        # A constant per-60 Hz-step chance is an exponential delay once armed; draw it up front;
+        if secondary_chance > 0:
+            rate = -60.0 * math.log1p(-min(secondary_chance, 0.999999))
+            delay = cls.SECONDARY_ARM + rng.exponential(1.0 / rate)
+        else:
+            delay = math.inf
+        if color is not None:
+            color = tuple(max(0, min(255, int(x))) for x in color[:3])
+        else:
+            color = tuple(rng.randint(128, 256, 3).tolist())
+        return color, rng.uniform((-2, -22), (2, -18)), delay
 
     def update(self, dt: float):
+        # Integration and culling happen in ParticleStore; this only runs the per-firework state machine.
+        store = self.store
         if not self.exploded:
-            self.rocket.update(dt)
-            if self.rocket.life <= 0 or self.rocket.vel.y >= 0:
+            if not self.rocket:
+                # Rocket evicted by the particle cap; retire without a burst;
+                self.exploded = True
+                return
+            i = self.rocket.start
+            if store.life[i] <= 0 or store.vel[i, 1] >= 0:
                 self.exploded = True
                 self.explode()
-        else:
-            for p in self.particles:
-                p.update(dt)
-            self.particles = [p for p in self.particles if p.life > 0]
-            if self.exploded and not self.second_exploded:
-                self.exploded_at += dt
-                if self.exploded_at > 0.8 and random.random() < 0.02 and len(self.particles) > 15:
-                    self.second_exploded = True
-                    center = random.choice(self.particles).pos
-                    self.secondary_explode(center)
-            for s in self.secondary:
-                s.update(dt)
-            self.secondary = [p for p in self.secondary if p.life > 0]
+                store.kill(self.rocket)
 
-    def draw(self, surf: pygame.Surface):
-        if not self.exploded:
-            self.rocket.draw(surf)
-        else:
-            for p in self.particles:
-                p.draw(surf)
-            for p in self.secondary:
-                p.draw(surf)
+    def handle_event(self, kind: str) -> None:
+        if kind == "secondary" and not self.second_exploded and len(self.particles) > self.SECONDARY_MIN_SPARKS:
+            self.second_exploded = True
+            center = self.store.pos[self.rng.randint(self.particles.start, self.particles.stop)].copy()
+            self.secondary_explode(center)
+
+    @property
+    def alive(self) -> bool:
+        return not (self.exploded and not self.particles and not self.secondary)
 
     def explode(self):
-        if self.mode == "burst":
-            for _ in range(60):
-                a = random.uniform(0, 2 * math.pi)
-                spd = random.uniform(3, 7)
-                vx, vy = math.cos(a) * spd, math.sin(a) * spd
-                self.particles.append(Particle(self.rocket.pos, (vx, vy), self.color, 1.3, random.uniform(1.5, 2.5)))
-        elif self.mode == "ring":
-            for i in range(36):
-                a = i * (2 * math.pi / 36)
-                vx, vy = math.cos(a) * 6, math.sin(a) * 6
-                self.particles.append(Particle(self.rocket.pos, (vx, vy), self.color, 1.2, random.uniform(1.2, 2.0)))
-        elif self.mode == "star":
-            for i in range(5):
-                a = i * (2 * math.pi / 5)
-                for r in [1, 2, 3]:
-                    vx = math.cos(a) * r * 4
-                    vy = math.sin(a) * r * 4
-                    spark = (
-                        int(min(255, self.color[0] + random.randint(-30, 30))),
-                        int(min(255, self.color[1] + random.randint(-30, 30))),
-                        int(min(255, self.color[2] + random.randint(-30, 30))),
-                    )
-                    self.particles.append(Particle(self.rocket.pos, (vx, vy), spark, 2, random.uniform(1, 2), drag=0.92))
-        else:
-            for i in range(20):
-                a = i * (2 * math.pi / 20)
-                s = random.uniform(2, 4)
-                vx, vy = math.cos(a) * s, math.sin(a) * s
-                self.particles.append(Particle(self.rocket.pos, (vx, vy), self.color, 1.6, random.uniform(1, 2), drag=0.96, gravity=0.12))
-
-    def secondary_explode(self, center: Vector2):
-        for _ in range(30):
-            a = random.uniform(0, 2 * math.pi)
-            s = random.uniform(2, 5)
-            cx, cy = math.cos(a) * s, math.sin(a) * s
-            c = (
-                min(255, self.color[0] + random.randint(-60, 60)),
-                min(255, self.color[1] + random.randint(-60, 60)),
-                min(255, self.color[2] + random.randint(-60, 60)),
-            )
-            self.secondary.append(Particle(center, (cx, cy), c, 1.2, random.uniform(1, 2), drag=0.95, gravity=0.1))
+        origin = self.store.pos[self.rocket.start].copy()
+        pattern = PATTERNS.get(self.mode, PATTERNS["trail"])
+        self.particles = pattern.spawn(self.store, origin, self.color, self.density, self.rng)
+        # No spark of the burst outlives pattern.life[1], so a later secondary could never fire;
+        if (self.events is not None and self.secondary_delay < pattern.life[1]
+                and len(self.particles) > self.SECONDARY_MIN_SPARKS):
+            self.events.schedule(self.events.now + self.secondary_delay, self, "secondary")
+
+    def secondary_explode(self, center):
+        self.secondary = SECONDARY.spawn(self.store, center, self.color, self.density, self.rng)
 
 class Starfield:
-    def __init__(self, star_count: int, width: int, height: int):
-        self.stars: List[List] = []
+    """Twinkling parallax stars held in NumPy arrays and written straight into the frame's pixels."""
+
+    LAYER_DRIFT = (1.5, 4.0, 9.0)
+    LAYER_SCALE = (0.6, 0.8, 1.0)
+    LAYER_SIZE = (1, 1, 2)
+
+    def __init__(self, star_count: int, width: int, height: int, layers: int = 3,
+                 layout: Optional[np.ndarray] = None, rng: Optional[RandomBlocks] = None):
         self.width = width
         self.height = height
-        self.surf = pygame.Surface((width, height), pygame.SRCALPHA)
-        for _ in range(star_count):
-            x = random.randint(0, width)
-            y = random.randint(0, height)
-            base_c = random.randint(180, 255)
-            phase = random.uniform(0, 2 * math.pi)
-            speed = random.uniform(0.3, 2)
-            self.stars.append([x, y, base_c, phase, speed])
+        if layout is None:
+            layout = self.generate_layout(star_count, width, height, layers, rng or RandomBlocks())
+        self.x = np.array(layout[:, 0], dtype=np.float32)
+        self.y = layout[:, 1].astype(np.int32)
+        self.base = np.array(layout[:, 2], dtype=np.float32)
+        self.phase = np.array(layout[:, 3], dtype=np.float32)
+        self.speed = np.array(layout[:, 4], dtype=np.float32)
+        self.layer = layout[:, 5].astype(np.int64)
+        self.drift = np.asarray(self.LAYER_DRIFT, dtype=np.float32)[self.layer]
+        self.scale = np.asarray(self.LAYER_SCALE, dtype=np.float32)[self.layer]
+        self.big = np.asarray(self.LAYER_SIZE)[self.layer] > 1
+        self.brightness = np.zeros(len(self.layer), dtype=np.uint8)
+        self._lut_key = None
+        self._lut = np.zeros(256, dtype=np.uint32)
+        self.update(0.0)
 
-    def update(self, dt: float):
-        for s in self.stars:
-            s[3] += s[4] * dt
-            s[2] += int(30 * math.sin(s[3]) * dt)
-            s[2] = max(150, min(255, s[2]))
+    @classmethod
+    def generate_layout(cls, star_count: int, width: int, height: int, layers: int, rng) -> np.ndarray:
+        """Star table with columns x, y, base brightness, phase, twinkle speed, layer."""
+        layers = max(1, min(layers, len(cls.LAYER_DRIFT)))
+        # Far layers hold more stars: weights 3:2:1 for three layers;
+        weights = np.arange(layers, 0, -1, dtype=np.float64)
+        per_layer = np.floor(star_count * weights / weights.sum()).astype(np.int64)
+        per_layer[0] += star_count - per_layer.sum()
+        layer = np.repeat(np.arange(layers), per_layer)
+        n = len(layer)
+        return np.column_stack((
+            rng.uniform(0, width, n),
+            rng.randint(0, height, n),
+            rng.randint(180, 256, n),
+            rng.uniform(0, 2 * math.pi, n),
+            rng.uniform(0.3, 2, n),
+            layer,
+        )).astype(np.float32)
+
+    def __len__(self) -> int:
+        return len(self.layer)
+
+    def update(self, dt: float) -> None:
+        self.phase += self.speed * dt
+        self.x += self.drift * dt
+        np.mod(self.x, self.width, out=self.x)
+        self.brightness = np.clip((self.base + 30 * np.sin(self.phase)) * self.scale, 0, 255).astype(np.uint8)
+
+    def _gray_lut(self, surf: pygame.Surface) -> np.ndarray:
+        key = (surf.get_bitsize(), surf.get_masks())
+        if key != self._lut_key:
+            self._lut = np.array([surf.map_rgb((c, c, c, 255)) & 0xFFFFFFFF for c in range(256)], dtype=np.uint32)
+            self._lut_key = key
+        return self._lut
+
+    def draw(self, surf: pygame.Surface) -> None:
+        if not len(self):
+            return
+        values = self._gray_lut(surf)[self.brightness]
+        xs = self.x.astype(np.int32)
+        ys = self.y
+        px = pygame.surfarray.pixels2d(surf)
+        px[xs, ys] = values
+        big = self.big
+        if big.any():
+            bx = np.minimum(xs[big] + 1, self.width - 1)
+            by = np.minimum(ys[big] + 1, self.height - 1)
+            bv = values[big]
+            px[bx, ys[big]] = bv
+            px[xs[big], by] = bv
+            px[bx, by] = bv
+        del px
+
+class RenderTargetPool:
+    """Reusable render targets keyed by size and format; ``release`` hands a target back for reuse."""
+
+    def __init__(self):
+        self._free: Dict[tuple, List[pygame.Surface]] = {}
+        self._keys: Dict[int, tuple] = {}
+        self.allocations = 0
+        self.reuses = 0
+        self.bytes = 0
+
+    @staticmethod
+    def _key(size: Tuple[int, int], flags: int, like: Optional[pygame.Surface]) -> tuple:
+        if like is not None:
+            return (tuple(size), like.get_bitsize(), like.get_masks())
+        return (tuple(size), flags)
+
+    def acquire(self, size: Tuple[int, int], flags: int = pygame.SRCALPHA, like: Optional[pygame.Surface] = None) -> pygame.Surface:
+        """A surface of ``size`` with ``flags`` (or the pixel format of ``like``)."""
+        key = self._key(size, flags, like)
+        free = self._free.get(key)
+        if free:
+            surf = free.pop()
+            self.reuses += 1
+        else:
+            surf = pygame.Surface(size, 0, like) if like is not None else pygame.Surface(size, flags)
+            self._keys[id(surf)] = key
+            self.allocations += 1
+            self.bytes += surf.get_pitch() * surf.get_height()
+        return surf
+
+    def release(self, surf: pygame.Surface) -> None:
+        key = self._keys.get(id(surf))
+        if key is not None:
+            self._free.setdefault(key, []).append(surf)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "allocations": self.allocations,
+            "reuses": self.reuses,
+            "free": sum(len(v) for v in self._free.values()),
+            "bytes": self.bytes,
+        }
 
-    def draw(self, surf: pygame.Surface):
-        self.surf.fill((0, 0, 0, 0))
-        for s in self.stars:
-            c = s[2]
-            color = (c, c, c, 255)
-            pygame.draw.circle(self.surf, color, (s[0], s[1]), 1)
-        surf.blit(self.surf, (0, 0))
 
 class CloudLayer:
-    def __init__(self, width: int, height: int):
+    """Scrolling noise clouds composited straight onto the frame with clipped blits."""
+
+    def __init__(self, width: int, height: int, update_hz: Optional[float] = None,
+                 noise: Optional[np.ndarray] = None, pool: Optional[RenderTargetPool] = None,
+                 rng: Optional[RandomBlocks] = None):
+        self.pool = pool
         self.width = width
         self.height = height
         self.offset_x = 0
@@ -198,66 +1071,883 @@ class CloudLayer:
         self.scroll_speed_x = 20
         self.scroll_speed_y = 10
         self.alpha = 70
-        self.noise_surf = self.generate_noise_surf()
-
-    def generate_noise_surf(self) -> pygame.Surface:
-        w2, h2 = self.width // 2, self.height // 2
-        noise = np.random.randint(0, 81, (h2, w2), dtype=np.uint8)
-        noise_rgb = np.stack([noise] * 3, axis=-1)
-        alpha = np.full((h2, w2, 1), 255, dtype=np.uint8)
-        noise_rgba = np.concatenate([noise_rgb, alpha], axis=-1)
-        surf = pygame.image.frombuffer(noise_rgba.tobytes(), (w2, h2), "RGBA")
-        surf = pygame.transform.smoothscale(surf, (self.width, self.height))
-        return surf.convert_alpha()
+        self.update_hz = update_hz
+        if noise is None:
+            noise = self.generate_noise(width, height, rng or RandomBlocks())
+        self.noise_surf = pygame.image.frombuffer(noise, (width, height), "RGB").convert()
+        self._layer: Optional[pygame.Surface] = None
+        self._layer_offset: Optional[Tuple[int, int]] = None
+        self._since_refresh = 0.0
+
+    @staticmethod
+    def generate_noise(width: int, height: int, rng) -> np.ndarray:
+        """Half-resolution value noise smoothscaled to full size, as a (height, width, 3) array."""
+        w2, h2 = width // 2, height // 2
+        noise = rng.randint(0, 81, (h2, w2)).astype(np.uint8)
+        noise_rgb = np.ascontiguousarray(np.stack([noise] * 3, axis=-1))
+        surf = pygame.image.frombuffer(noise_rgb, (w2, h2), "RGB")
+        surf = pygame.transform.smoothscale(surf, (width, height))
+        return np.ascontiguousarray(pygame.surfarray.array3d(surf).transpose(1, 0, 2))
 
     def update(self, dt: float):
         self.offset_x += self.scroll_speed_x * dt
         self.offset_y += self.scroll_speed_y * dt
+        self._since_refresh += dt
+
+    def _offset(self) -> Tuple[int, int]:
+        return int(self.offset_x) % self.width, int(self.offset_y) % self.height
+
+    def _composite(self, dst: pygame.Surface, ox: int, oy: int) -> None:
+        w, h = self.width, self.height
+        src = self.noise_surf
+        dst.blit(src, (0, 0), (ox, oy, w - ox, h - oy))
+        if ox:
+            dst.blit(src, (w - ox, 0), (0, oy, ox, h - oy))
+        if oy:
+            dst.blit(src, (0, h - oy), (ox, 0, w - ox, oy))
+        if ox and oy:
+            dst.blit(src, (w - ox, h - oy), (0, 0, ox, oy))
 
     def draw(self, surf: pygame.Surface):
-        ox = int(self.offset_x) % self.width
-        oy = int(self.offset_y) % self.height
-        tmp = pygame.Surface((self.width, self.height), pygame.SRCALPHA)
-        tmp.blit(self.noise_surf, (-ox, -oy))
-        tmp.blit(self.noise_surf, (-ox + self.width, -oy))
-        tmp.blit(self.noise_surf, (-ox, -oy + self.height))
-        tmp.blit(self.noise_surf, (-ox + self.width, -oy + self.height))
-        tmp.set_alpha(self.alpha)
-        surf.blit(tmp, (0, 0), special_flags=pygame.BLEND_ALPHA_SDL2)
-
-def bloom_pass(surf: pygame.Surface) -> pygame.Surface:
-    scale = 0.25
-    w, h = int(surf.get_width() * scale), int(surf.get_height() * scale)
-    small = pygame.transform.smoothscale(surf, (w, h))
-    for _ in range(2):
-        small = pygame.transform.smoothscale(small, (w, h))
-    bloom = pygame.transform.smoothscale(small, surf.get_size())
-    final = surf.copy()
-    final.blit(bloom, (0, 0), special_flags=pygame.BLEND_ADD)
-    return final
+        if not self.update_hz:
+            self.noise_surf.set_alpha(self.alpha)
+            self._composite(surf, *self._offset())
+            return
+        if self._layer is None:
+            size = (self.width, self.height)
+            display = pygame.display.get_surface()
+            if self.pool is not None:
+                self._layer = self.pool.acquire(size, like=display)
+            else:
+                self._layer = pygame.Surface(size, 0, display)
+        offset = self._offset()
+        if self._layer_offset is None or (offset != self._layer_offset and self._since_refresh >= 1.0 / self.update_hz):
+            self.noise_surf.set_alpha(None)
+            self._composite(self._layer, *offset)
+            self._layer_offset = offset
+            self._since_refresh = 0.0
+        self._layer.set_alpha(self.alpha)
+        surf.blit(self._layer, (0, 0))
+
+class TrailBuffer:
+    """Persistent surface that fades each frame, turning the sparks drawn into it into trails."""
+
+    def __init__(self, seconds: float = 0.6, pool: Optional[RenderTargetPool] = None):
+        self.seconds = seconds
+        self.pool = pool if pool is not None else RenderTargetPool()
+        self.surface: Optional[pygame.Surface] = None
+        self.level = 0  # upper bound on the brightest pixel still in the buffer;
+
+    @property
+    def enabled(self) -> bool:
+        return self.seconds > 0
+
+    def begin(self, frame: pygame.Surface, dt: float, has_sparks: bool) -> Optional[pygame.Surface]:
+        """Fade the buffer for this frame; returns it to draw into, or None when there is nothing to do."""
+        if not self.enabled or (not has_sparks and self.level <= 0):
+            return None
+        if self.surface is None or self.surface.get_size() != frame.get_size():
+            if self.surface is not None:
+                self.pool.release(self.surface)
+            self.surface = self.pool.acquire(frame.get_size(), like=frame)
+            self.surface.fill((0, 0, 0))
+            self.level = 0
+        step = max(1, round(255 * dt / self.seconds))
+        # Subtractive, since pygame's multiplicative fill rounds up and never reaches black;
+        if self.level > 0:
+            self.surface.fill((step, step, step), special_flags=pygame.BLEND_RGB_SUB)
+        self.level = 255 if has_sparks else self.level - step
+        return self.surface
+
+    def composite(self, frame: pygame.Surface) -> None:
+        frame.blit(self.surface, (0, 0), special_flags=pygame.BLEND_RGB_ADD)
+
+
+# Pyramid levels, upsampling scratch and the full-size target one frame blooms into;
+BloomTargets = Tuple[List[pygame.Surface], List[pygame.Surface], Optional[pygame.Surface]]
+
+
+class BloomPass:
+    """Bright-pass bloom over a downsampled pyramid whose targets persist per frame size and quality."""
+
+    QUALITY = {
+        "off": (0.0, 0),
+        "low": (0.125, 1),
+        "medium": (0.25, 2),
+        "high": (0.5, 3),
+    }
+
+    def __init__(self, quality: str = "medium", threshold: float = 96.0, intensity: float = 1.0,
+                 pool: Optional[RenderTargetPool] = None):
+        self.pool = pool if pool is not None else RenderTargetPool()
+        self.threshold = threshold
+        self.intensity = intensity
+        self.quality = quality
+        self._key = None
+        self._levels: List[pygame.Surface] = []
+        self._scratch: List[pygame.Surface] = []
+        self._full: Optional[pygame.Surface] = None
+        self._lut_key = None
+        self._lut = np.zeros(256, dtype=np.uint16)
+
+    def set_quality(self, quality: str) -> None:
+        if quality not in self.QUALITY:
+            raise ValueError(f"unknown bloom quality {quality!r}; expected one of {list(self.QUALITY)}")
+        self.quality = quality
+
+    def _allocate(self, surf: pygame.Surface, quality: str, idle: Optional[Callable[[], None]] = None) -> None:
+        scale, levels = self.QUALITY[quality]
+        key = (surf.get_size(), surf.get_bitsize(), surf.get_masks(), quality)
+        if key == self._key:
+            return
+        # Frames still blooming on the worker use the old targets; let them finish first;
+        if idle is not None:
+            idle()
+        self._key = key
+        for target in self._levels + self._scratch + ([self._full] if self._full is not None else []):
+            self.pool.release(target)
+        self._levels = []
+        self._scratch = []
+        w, h = surf.get_size()
+        size = (max(1, int(w * scale)), max(1, int(h * scale)))
+        for i in range(levels):
+            self._levels.append(self.pool.acquire(size, like=surf))
+            if i:
+                self._scratch.append(self.pool.acquire(self._levels[i - 1].get_size(), like=surf))
+            size = (max(1, size[0] // 2), max(1, size[1] // 2))
+        self._full = self.pool.acquire((w, h), like=surf) if levels else None
+
+    def _gain_lut(self, levels: int) -> np.ndarray:
+        # Soft threshold as a 256-entry table: keep only the luminance above the
+        # threshold, spread back over RGB, in 8.8 fixed point;
+        key = (self.threshold, self.intensity, levels)
+        if key != self._lut_key:
+            lum = np.arange(256, dtype=np.float32)
+            gain = np.maximum(lum - self.threshold, 0.0) / np.maximum(lum, 1.0) * (self.intensity / levels)
+            self._lut = np.minimum(gain * 256.0, 65535.0 / 255.0).astype(np.uint16)
+            self._lut_key = key
+        return self._lut
+
+    def _bright_pass(self, surf: pygame.Surface, levels: int) -> None:
+        lut = self._gain_lut(levels)
+        px = pygame.surfarray.pixels3d(surf)
+        rgb = px.astype(np.uint16)
+        lum = (rgb[..., 0] * 77 + rgb[..., 1] * 150 + rgb[..., 2] * 29) >> 8
+        rgb *= lut[lum][..., None]
+        rgb >>= 8
+        np.minimum(rgb, 255, out=rgb)
+        px[...] = rgb
+        del px
+
+    def prepare(self, surf: pygame.Surface, idle: Optional[Callable[[], None]] = None) -> BloomTargets:
+        """Main-thread half of ``apply``: fix this frame's quality and targets (the pool is not thread-safe)."""
+        quality = self.quality
+        if quality == "off":
+            return [], [], None
+        self._allocate(surf, quality, idle)
+        return list(self._levels), list(self._scratch), self._full
+
+    def apply(self, surf: pygame.Surface, targets: Optional[BloomTargets] = None) -> pygame.Surface:
+        """Add bloom onto ``surf`` in place and return it."""
+        levels, scratch, full = targets if targets is not None else self.prepare(surf)
+        if not levels:
+            return surf
+        smoothscale = pygame.transform.smoothscale
+        smoothscale(surf, levels[0].get_size(), levels[0])
+        self._bright_pass(levels[0], len(levels))
+        for i in range(1, len(levels)):
+            smoothscale(levels[i - 1], levels[i].get_size(), levels[i])
+        for i in range(len(levels) - 1, 0, -1):
+            smoothscale(levels[i], scratch[i - 1].get_size(), scratch[i - 1])
+            levels[i - 1].blit(scratch[i - 1], (0, 0), special_flags=pygame.BLEND_ADD)
+        smoothscale(levels[0], surf.get_size(), full)
+        surf.blit(full, (0, 0), special_flags=pygame.BLEND_ADD)
+        return surf
+
+class FramePipeline:
+    """Runs ``stage`` (the bloom) on frame N in a worker thread while frame N+1 is simulated and drawn."""
+
+    def __init__(self, stage: Callable[..., pygame.Surface], depth: int = 1,
+                 prepare: Optional[Callable[[pygame.Surface, Callable[[], None]], object]] = None):
+        self.stage = stage
+        # Runs on the submitting thread and its result goes to ``stage``; it may wait for in-flight frames;
+        self.prepare = prepare
+        # Output lags input by ``depth`` frames; 0 runs ``stage`` synchronously;
+        self.depth = max(0, depth)
+        self._pending: Deque[Future] = deque()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="post") if self.depth else None
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def _wait_idle(self) -> None:
+        wait(self._pending)
+
+    def _args(self, surf: pygame.Surface) -> tuple:
+        return (surf,) if self.prepare is None else (surf, self.prepare(surf, self._wait_idle))
+
+    def submit(self, surf: pygame.Surface) -> Optional[pygame.Surface]:
+        if not self.depth:
+            return self.stage(*self._args(surf))
+        self._pending.append(self._executor.submit(self.stage, *self._args(surf)))
+        if len(self._pending) > self.depth:
+            return self._pending.popleft().result()
+        return None
+
+    async def submit_async(self, surf: pygame.Surface) -> Optional[pygame.Surface]:
+        """Like ``submit`` but awaits the worker without blocking the event loop."""
+        if not self.depth:
+            return self.stage(*self._args(surf))
+        self._pending.append(self._executor.submit(self.stage, *self._args(surf)))
+        if len(self._pending) > self.depth:
+            return await asyncio.wrap_future(self._pending.popleft())
+        return None
+
+    def drain(self) -> List[pygame.Surface]:
+        frames = [future.result() for future in self._pending]
+        self._pending.clear()
+        return frames
+
+    def close(self) -> None:
+        self.drain()
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+
+class FrameProfiler:
+    """Per-phase frame timings and live counters in fixed-size ring buffers; ``lap(phase)`` charges the time since the last lap."""
+
+    PHASES = ("events", "ui_update", "launch", "starfield", "clouds", "update",
+              "background", "draw", "bloom", "draw_ui", "flip")
+    COUNTERS = ("particles", "fireworks", "glow_entries", "glow_bytes", "target_allocs",
+                "quality_level", "evicted", "culled", "bursts_culled", "retired")
+    COLORS = ((90, 90, 90), (120, 120, 200), (200, 120, 200), (230, 230, 230), (150, 150, 150), (240, 80, 80),
+              (80, 80, 160), (250, 170, 40), (80, 220, 120), (60, 200, 220), (220, 220, 60))
+
+    def __init__(self, history: int = 600, dump_path: Optional[str] = None, dump_interval: float = 10.0):
+        self.history = history
+        self.dump_path = dump_path
+        self.dump_interval = dump_interval
+        self.show_overlay = False
+        self.frames = 0
+        self.times = np.zeros((len(self.PHASES), history), dtype=np.float32)
+        self.frame_times = np.zeros(history, dtype=np.float32)
+        self.counters = np.zeros((len(self.COUNTERS), history), dtype=np.int64)
+        self._index = {phase: i for i, phase in enumerate(self.PHASES)}
+        self._current = np.zeros(len(self.PHASES), dtype=np.float64)
+        self._frame_start = self._mark = time.perf_counter()
+        self._last_dump = self._frame_start
+        self._overlay: Optional[pygame.Surface] = None
+        self._font: Optional[pygame.font.Font] = None
+
+    def begin_frame(self) -> None:
+        self._current[:] = 0.0
+        self._frame_start = self._mark = time.perf_counter()
+
+    def lap(self, phase: str) -> None:
+        now = time.perf_counter()
+        self._current[self._index[phase]] += now - self._mark
+        self._mark = now
+
+    def end_frame(self, **counters: int) -> None:
+        slot = self.frames % self.history
+        self.times[:, slot] = self._current
+        self.frame_times[slot] = time.perf_counter() - self._frame_start
+        for i, name in enumerate(self.COUNTERS):
+            self.counters[i, slot] = counters.get(name, 0)
+        self.frames += 1
+        if self.dump_path and self._mark - self._last_dump >= self.dump_interval:
+            self.dump(self.dump_path)
+
+    def _chronological(self, row: np.ndarray) -> np.ndarray:
+        n = min(self.frames, self.history)
+        start = (self.frames - n) % self.history
+        return np.roll(row, -start, axis=-1)[..., :n]
+
+    def last(self) -> Dict[str, float]:
+        """Millisecond breakdown of the most recent frame."""
+        if not self.frames:
+            return {}
+        slot = (self.frames - 1) % self.history
+        result = {phase: float(self.times[i, slot]) * 1000.0 for i, phase in enumerate(self.PHASES)}
+        result["frame"] = float(self.frame_times[slot]) * 1000.0
+        return result
+
+    def samples(self) -> Dict[str, List[float]]:
+        """Recorded history (oldest first) in milliseconds, plus the sampled counters."""
+        data: Dict[str, List[float]] = {}
+        times = self._chronological(self.times) * 1000.0
+        for i, phase in enumerate(self.PHASES):
+            data[phase] = times[i].tolist()
+        data["frame"] = (self._chronological(self.frame_times) * 1000.0).tolist()
+        counters = self._chronological(self.counters)
+        for i, name in enumerate(self.COUNTERS):
+            data[name] = counters[i].tolist()
+        return data
+
+    def dump(self, path: str) -> None:
+        """Write the ring-buffer history as CSV, or JSON when ``path`` ends in ``.json``."""
+        self._last_dump = time.perf_counter()
+        data = self.samples()
+        first = self.frames - len(data["frame"])
+        if path.endswith(".json"):
+            with open(path, "w") as fh:
+                json.dump({"first_frame": first, **data}, fh)
+            return
+        columns = list(data)
+        with open(path, "w", newline="") as fh:
+            writer = csv.writer(fh)
+            writer.writerow(["frame"] + [c if c in self.COUNTERS else f"{c}_ms" for c in columns])
+            for row, values in enumerate(zip(*(data[c] for c in columns))):
+                writer.writerow([first + row] + [round(v, 4) if isinstance(v, float) else v for v in values])
+
+    def draw_overlay(self, surf: pygame.Surface, width: int = 300, height: int = 120, budget_ms: float = 33.3) -> None:
+        """Stacked per-phase graph of the last ``width`` frames in the bottom-left corner."""
+        if not self.show_overlay or not self.frames:
+            return
+        if self._overlay is None:
+            self._overlay = pygame.Surface((width, height))
+            self._font = pygame.font.SysFont(None, 18)
+        times = self._chronological(self.times)[:, -width:] * 1000.0
+        cols = times.shape[1]
+        cum = np.cumsum(times, axis=0) * (height / budget_ms)
+        ys = np.arange(height)[::-1]
+        idx = (cum[:, :, None] <= ys[None, None, :]).sum(axis=0)
+        palette = np.array(self.COLORS + ((16, 16, 16),), dtype=np.uint8)
+        pixels = np.full((width, height, 3), 16, dtype=np.uint8)
+        pixels[width - cols:] = palette[idx]
+        pygame.surfarray.blit_array(self._overlay, pixels)
+        x, y = 10, surf.get_height() - height - 10
+        surf.blit(self._overlay, (x, y))
+        last = self.last()
+        counters = {name: int(self.counters[i, (self.frames - 1) % self.history]) for i, name in enumerate(self.COUNTERS)}
+        text = f"frame {last['frame']:.1f} ms | particles {counters['particles']} | fireworks {counters['fireworks']}"
+        surf.blit(self._font.render(text, True, (255, 255, 255)), (x, y - 16))
+
+
+class QualityLevel(NamedTuple):
+    name: str
+    density: float            # fraction of each explosion pattern's particle count;
+    secondary_chance: float   # chance of a secondary burst per 1/60 s once armed;
+    bloom: str                # highest bloom quality allowed at this level;
+    clouds: bool
+    particle_cap: Optional[int]
+
+
+class QualityGovernor:
+    """Steps a discrete quality level with hysteresis to keep the smoothed frame time under a budget."""
+
+    LEVELS = (
+        QualityLevel("high", 1.0, 0.02, "high", True, None),
+        QualityLevel("medium", 0.7, 0.01, "medium", True, 40000),
+        QualityLevel("low", 0.45, 0.005, "low", False, 20000),
+        QualityLevel("minimal", 0.25, 0.0, "off", False, 8000),
+    )
+
+    def __init__(self, budget_ms: float = 16.6, enabled: bool = True, headroom: float = 0.75,
+                 down_frames: int = 15, up_frames: int = 120, cooldown_frames: int = 30, smoothing: float = 0.1):
+        self.budget_ms = budget_ms
+        self.enabled = enabled
+        self.headroom = headroom
+        self.down_frames = down_frames
+        self.up_frames = up_frames
+        self.cooldown_frames = cooldown_frames
+        self.smoothing = smoothing
+        self.level = 0
+        self.smoothed: Optional[float] = None
+        self.changes = 0
+        self._over = 0
+        self._under = 0
+        self._cooldown = 0
+
+    @property
+    def current(self) -> QualityLevel:
+        return self.LEVELS[self.level]
+
+    def set_level(self, level) -> None:
+        """Jump to a level by index or name; the governor keeps adjusting from there if enabled."""
+        if isinstance(level, str):
+            names = [q.name for q in self.LEVELS]
+            if level not in names:
+                raise ValueError(f"unknown quality level {level!r}; expected one of {names}")
+            level = names.index(level)
+        if not 0 <= level < len(self.LEVELS):
+            raise ValueError(f"quality level index {level} out of range")
+        self.level = level
+        self._over = self._under = 0
+        self._cooldown = self.cooldown_frames
+
+    def update(self, frame_ms: float) -> bool:
+        """Feed one frame time; returns True when the level changed."""
+        if not self.enabled:
+            return False
+        if self.smoothed is None:
+            self.smoothed = frame_ms
+        else:
+            self.smoothed += (frame_ms - self.smoothed) * self.smoothing
+        if self._cooldown:
+            self._cooldown -= 1
+            return False
+        if self.smoothed > self.budget_ms:
+            self._over += 1
+            self._under = 0
+        elif self.smoothed < self.budget_ms * self.headroom:
+            self._under += 1
+            self._over = 0
+        else:
+            self._over = self._under = 0
+        if self._over >= self.down_frames and self.level < len(self.LEVELS) - 1:
+            self.set_level(self.level + 1)
+        elif self._under >= self.up_frames and self.level > 0:
+            self.set_level(self.level - 1)
+        else:
+            return False
+        self.changes += 1
+        return True
+
+
+class LaunchScheduler:
+    """Timed launch cues from a JSON or TOML show file, kept in a min-heap ordered by time."""
+
+    def __init__(self, cues: Optional[List[dict]] = None, meta: Optional[Dict[str, object]] = None):
+        self.meta: Dict[str, object] = dict(meta or {})
+        self._heap: List[Tuple[float, int, dict]] = []
+        self._seq = 0
+        self.end_time = 0.0
+        for cue in cues or ():
+            self.add(cue)
+
+    @classmethod
+    def load(cls, path: str) -> "LaunchScheduler":
+        if path.endswith(".toml"):
+            if tomllib is None:
+                raise RuntimeError("TOML shows need Python 3.11+ (tomllib)")
+            with open(path, "rb") as fh:
+                show = tomllib.load(fh)
+        else:
+            with open(path) as fh:
+                show = json.load(fh)
+        # A bare list is the launches alone; otherwise seed/width/height/fps/duration ride along as metadata;
+        if isinstance(show, list):
+            show = {"launches": show}
+        cues = show.pop("launches", [])
+        return cls(cues, show)
+
+    def add(self, cue: dict) -> None:
+        if not {"t", "x", "y"} <= set(cue):
+            raise ValueError(f"launch cue {cue!r} needs 't', 'x' and 'y'")
+        mode = cue.get("mode")
+        if mode is not None and mode not in PATTERNS:
+            raise ValueError(f"unknown mode {mode!r} in cue {cue!r}; expected one of {list(PATTERNS)}")
+        count = int(cue.get("count", 1))
+        if count < 1:
+            raise ValueError(f"cue count must be >= 1, got {count}")
+        spread = float(cue.get("spread", 0.0))
+        interval = float(cue.get("interval", 0.0))
+        launch = {"mode": mode, "color": cue.get("color")}
+        for k in range(count):
+            offset = spread * (k / (count - 1) - 0.5) if count > 1 else 0.0
+            t = float(cue["t"]) + k * interval
+            heapq.heappush(self._heap, (t, self._seq, dict(launch, x=float(cue["x"]) + offset, y=float(cue["y"]))))
+            self._seq += 1
+            self.end_time = max(self.end_time, t)
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def next_time(self) -> Optional[float]:
+        return self._heap[0][0] if self._heap else None
+
+    def pending(self) -> List[Tuple[float, dict]]:
+        """Every launch not yet fired as ``(t, cue)``, in firing order, without consuming them."""
+        return [(t, cue) for t, _, cue in sorted(self._heap, key=lambda entry: entry[:2])]
+
+    def due(self, now: float) -> List[dict]:
+        """Pop every launch scheduled at or before ``now``, in time then script order."""
+        heap = self._heap
+        fired = []
+        while heap and heap[0][0] <= now + 1e-9:
+            fired.append(heapq.heappop(heap)[2])
+        return fired
+
+
+def drag_series(drag, n, step: float = 1.0) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """``d**n`` and the geometric sums of the drag recurrence after ``n`` steps, for ``kinematics``."""
+    # d**n, sum(d**j, j<n), sum(d**k, k=1..n) and sum(sum(d**j, j<k), k=1..n) with d the drag over one step;
+    # drag == 1 is the linear limit;
+    drag = np.asarray(drag, dtype=np.float64) ** step
+    n = np.asarray(n, dtype=np.float64)
+    dn = drag ** n
+    unit = drag == 1.0
+    one_minus = np.where(unit, 1.0, 1.0 - drag)
+    vel_sum = np.where(unit, n, (1.0 - dn) / one_minus)
+    pos_sum = np.where(unit, n, drag * vel_sum)
+    gravity_sum = np.where(unit, n * (n + 1) / 2, (n - pos_sum) / one_minus)
+    return dn, vel_sum, pos_sum, gravity_sum
+
+
+def kinematics(pos0, vel0, drag, gravity, n, step: float) -> Tuple[np.ndarray, np.ndarray]:
+    """Position and velocity after ``n`` steps of ``ParticleStore.integrate``, without stepping."""
+    # v' = d**step*v + (0, g*step), p' = p + v'*step summed over n steps; the rest broadcast over vel0's rows;
+    vel0 = np.asarray(vel0, dtype=np.float64)
+    dn, vel_sum, pos_sum, gravity_sum = drag_series(drag, n, step)
+    gravity = np.asarray(gravity, dtype=np.float64)
+    vel = vel0 * dn[..., None]
+    vel[:, 1] += gravity * step * vel_sum
+    pos = np.asarray(pos0, dtype=np.float64) + vel0 * (step * pos_sum)[..., None]
+    pos[:, 1] += gravity * step * step * gravity_sum
+    return pos, vel
+
+
+class ShowTimeline:
+    """A scripted show compiled to spawn batches whose sparks are evaluated in closed form at any frame."""
+
+    def __init__(self, dt: float, sim_dt: float, width: int, height: int):
+        self.dt = dt
+        self.sim_dt = sim_dt
+        self.step = sim_dt * 60
+        self.width = width
+        self.height = height
+        self._birth_step = 0
+        self._frame = 0
+        self._batches: List[Dict[str, object]] = []
+
+    def spawn(self, pos, vel, color, radius, life, drag=0.96, gravity=0.1, trail=False) -> int:
+        """Record a batch born at the current compile step; mirrors ``ParticleStore.spawn``, returns the batch id."""
+        vel = np.asarray(vel, dtype=np.float64).reshape(-1, 2)
+        n = len(vel)
+        self._batches.append({
+            "origin": np.asarray(pos, dtype=np.float64).reshape(2),
+            "vel": vel,
+            "color": np.broadcast_to(np.clip(np.asarray(color, dtype=np.int32), 0, 255), (n, 3)).astype(np.uint8),
+            "life": np.broadcast_to(np.asarray(life, dtype=np.float64), (n,)).copy(),
+            "radius": float(radius),
+            "drag": float(drag),
+            "gravity": float(gravity),
+            "trail": trail,
+            "birth": self._birth_step,
+            "frame": self._frame,
+            "end": np.iinfo(np.int64).max,
+        })
+        return len(self._batches) - 1
+
+    def _batch_state(self, b: int, age: int) -> Tuple[np.ndarray, np.ndarray]:
+        batch = self._batches[b]
+        return kinematics(batch["origin"], batch["vel"], batch["drag"], batch["gravity"], age, self.step)
+
+    @classmethod
+    def compile(cls, schedule: "LaunchScheduler", frames: int, dt: float, rng: RandomBlocks, level: "QualityLevel",
+                mode: str, width: int, height: int, sim_dt: float = 1 / 60, max_substeps: int = 8) -> "ShowTimeline":
+        """Replay ``frames`` frames of ``schedule``'s launches at a fixed ``dt`` without integrating any spark."""
+        timeline = cls(dt, sim_dt, width, height)
+        cues = schedule.pending()
+        next_cue = 0
+        events = EventQueue()
+        explosions: Dict[int, List[dict]] = {}
+        steps = np.zeros(frames, dtype=np.int64)
+        alphas = np.zeros(frames)
+        accumulator = 0.0
+        sim_time = 0.0
+        step = 0
+        # Same clocks, epsilons and draw order as render_offline -> update -> step;
+        for frame in range(frames):
+            timeline._birth_step = step
+            timeline._frame = frame
+            while next_cue < len(cues) and cues[next_cue][0] <= frame * dt + 1e-9:
+                cue = cues[next_cue][1]
+                next_cue += 1
+                timeline._launch((cue["x"], cue["y"]), cue["mode"] or mode, cue["color"], level, rng, explosions)
+            accumulator = min(accumulator + dt, sim_dt * max_substeps)
+            while accumulator >= sim_dt - 1e-9:
+                step += 1
+                sim_time += sim_dt
+                events.now = sim_time
+                timeline._birth_step = step
+                for firework in explosions.pop(step, ()):
+                    timeline._explode(firework, rng, events)
+                for firework, kind in events.advance(sim_time):
+                    timeline._secondary(firework, rng, step)
+                accumulator -= sim_dt
+            steps[frame] = step
+            alphas[frame] = min(1.0, max(0.0, accumulator / sim_dt))
+        timeline._pack(steps, alphas)
+        return timeline
+
+    def _launch(self, pos, mode: str, color, level: "QualityLevel", rng: RandomBlocks,
+                explosions: Dict[int, List[dict]]) -> None:
+        color, velocity, delay = Firework.draw_launch(rng, color, level.secondary_chance)
+        rocket = self.spawn(pos, velocity, color, **Firework.ROCKET)
+        batch = self._batches[rocket]
+        # Explodes on the first step its life runs out or it stops climbing, unless retired off screen before;
+        ages = np.arange(1, int(math.ceil(Firework.ROCKET["life"] / self.sim_dt)) + 2)
+        pos, vel = self._batch_state(rocket, ages)
+        fire = np.flatnonzero((batch["life"][0] - ages * self.sim_dt <= 0) | (vel[:, 1] >= 0))[0]
+        gone = np.flatnonzero(ParticleStore.offscreen(pos, vel, batch["radius"], batch["gravity"], self.width, self.height))
+        if len(gone) and gone[0] < fire:
+            batch["end"] = batch["birth"] + int(ages[gone[0]])
+            return
+        batch["end"] = batch["birth"] + int(ages[fire])
+        explosions.setdefault(batch["end"], []).append({
+            "origin": pos[fire], "mode": mode, "color": color, "delay": delay, "density": level.density, "burst": None,
+        })
+
+    def _explode(self, firework: dict, rng: RandomBlocks, events: EventQueue) -> None:
+        pattern = PATTERNS.get(firework["mode"], PATTERNS["trail"])
+        burst = firework["burst"] = pattern.spawn(self, firework["origin"], firework["color"], firework["density"], rng)
+        if firework["delay"] < pattern.life[1] and len(self._batches[burst]["life"]) > Firework.SECONDARY_MIN_SPARKS:
+            events.schedule(events.now + firework["delay"], firework, "secondary")
+
+    def _secondary(self, firework: dict, rng: RandomBlocks, step: int) -> None:
+        # Firework.handle_event sees the burst as the previous step's cull left it, at this step's positions;
+        burst = firework["burst"]
+        batch = self._batches[burst]
+        age = step - batch["birth"]
+        pos, vel = self._batch_state(burst, age - 1)
+        live = batch["life"] - (age - 1) * self.sim_dt > 0
+        live &= ~ParticleStore.offscreen(pos, vel, batch["radius"], batch["gravity"], self.width, self.height)
+        live = np.flatnonzero(live)
+        if len(live) <= Firework.SECONDARY_MIN_SPARKS:
+            return
+        j = live[rng.randint(0, len(live))]
+        center = kinematics(batch["origin"], batch["vel"][j:j + 1], batch["drag"], batch["gravity"], age, self.step)[0][0]
+        SECONDARY.spawn(self, center, firework["color"], firework["density"], rng)
+
+    def _pack(self, steps: np.ndarray, alphas: np.ndarray) -> None:
+        batches = self._batches
+        self.steps = steps
+        self.alphas = alphas
+        sizes = np.array([len(b["life"]) for b in batches], dtype=np.int64)
+        self.offsets = np.concatenate(([0], np.cumsum(sizes)))
+        self.birth = np.array([b["birth"] for b in batches], dtype=np.int64)
+        # A rocket is born on the step before its frame's substeps, which the previous frame ends on;
+        self.first_frame = np.array([b["frame"] for b in batches], dtype=np.int64)
+        self.end = np.array([b["end"] for b in batches], dtype=np.int64)
+        self.origin = np.array([b["origin"] for b in batches]).reshape(-1, 2)
+        self.radius = np.array([b["radius"] for b in batches])
+        self.drag = np.array([b["drag"] for b in batches])
+        self.gravity = np.array([b["gravity"] for b in batches])
+        self.trail = np.array([b["trail"] for b in batches], dtype=bool)
+        self.vel0 = np.concatenate([b["vel"] for b in batches]) if batches else np.zeros((0, 2))
+        self.color = np.concatenate([b["color"] for b in batches]) if batches else np.zeros((0, 3), dtype=np.uint8)
+        self.life0 = np.concatenate([b["life"] for b in batches]) if batches else np.zeros(0)
+        self.vmin = np.array([b["vel"].min(axis=0) for b in batches]).reshape(-1, 2)
+        self.vmax = np.array([b["vel"].max(axis=0) for b in batches]).reshape(-1, 2)
+        self.life_max = np.array([b["life"].max() for b in batches])
+        lifetime = np.minimum(self.end - self.birth, np.ceil(self.life_max / self.sim_dt).astype(np.int64) + 1)
+        self.max_age = int(lifetime.max()) if len(lifetime) else 0
+        self._batches = []
+
+    def __len__(self) -> int:
+        return len(self.steps)
+
+    @property
+    def sparks(self) -> int:
+        return int(self.offsets[-1])
+
+    def _on_screen(self, b: np.ndarray, age: np.ndarray) -> np.ndarray:
+        # Every spark of a batch shares origin, drag and gravity, so its sparks at a given age are an
+        # affine image of the initial velocities and the batch box follows from their per-axis range;
+        step = self.step
+        margin = self.radius[b] * 2.5
+        lo = np.full((len(b), 2), np.inf)
+        hi = np.full((len(b), 2), -np.inf)
+        for a in (age, np.maximum(age - 1, 0)):  # current and interpolated-from positions;
+            _, _, pos_sum, gravity_sum = drag_series(self.drag[b], a, step)
+            fall = np.stack([np.zeros(len(b)), self.gravity[b] * step * step * gravity_sum], axis=1)
+            base = self.origin[b] + fall
+            lo = np.minimum(lo, base + self.vmin[b] * (step * pos_sum)[:, None])
+            hi = np.maximum(hi, base + self.vmax[b] * (step * pos_sum)[:, None])
+        return ((hi[:, 0] + margin >= 0) & (lo[:, 0] - margin <= self.width)
+                & (hi[:, 1] + margin >= 0) & (lo[:, 1] - margin <= self.height))
+
+    def state(self, frame: int, viewport: bool = True, trails_only: bool = False):
+        """Sparks alive at ``frame`` as ``(pos, prev_pos, color, radius, life, group, trail_groups)``; ``group`` is the batch id."""
+        # Only batches alive at this step are touched; the governor's particle-cap eviction is not modelled;
+        n = int(self.steps[frame])
+        b = np.arange(np.searchsorted(self.birth, n - self.max_age), np.searchsorted(self.birth, n, "right"))
+        if trails_only:
+            b = b[self.trail[b]]
+        age = n - self.birth[b]
+        keep = (n < self.end[b]) & (age * self.sim_dt < self.life_max[b]) & (self.first_frame[b] <= frame)
+        b, age = b[keep], age[keep]
+        if viewport and len(b):
+            keep = self._on_screen(b, age)
+            b, age = b[keep], age[keep]
+        counts = self.offsets[b + 1] - self.offsets[b]
+        total = int(counts.sum())
+        owner = np.repeat(b, counts)
+        idx = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts) + np.repeat(self.offsets[b], counts)
+        spark_age = np.repeat(age, counts)
+        drag, gravity, origin = self.drag[owner], self.gravity[owner], self.origin[owner]
+        pos, _ = kinematics(origin, self.vel0[idx], drag, gravity, spark_age, self.step)
+        prev, _ = kinematics(origin, self.vel0[idx], drag, gravity, np.maximum(spark_age - 1, 0), self.step)
+        life = self.life0[idx] - spark_age * self.sim_dt
+        alive = life > 0
+        owner = owner[alive]
+        trail_groups = np.unique(owner[self.trail[owner]]).tolist()
+        return pos[alive], prev[alive], self.color[idx][alive], self.radius[owner], life[alive], owner, trail_groups
+
+
+class SessionLog:
+    """Compact binary session log: a seed and screen-size header, then tagged per-frame input records."""
+
+    # Records in the order the simulation consumed them: L launch, F frame dt (as update starts),
+    # Q quality change, and a final E with the frame count and a digest of the particle state;
+    MAGIC = b"FWRC"
+    VERSION = 1
+    HEADER = struct.Struct("<4sHqHHd")
+    FRAME = struct.Struct("<d")
+    LAUNCH = struct.Struct("<ffBB3B")
+    QUALITY = struct.Struct("<B")
+    END = struct.Struct("<I16s")
+    PAYLOADS = {b"F": FRAME, b"L": LAUNCH, b"Q": QUALITY, b"E": END}
+
+    def __init__(self, path: str, seed: int, width: int, height: int, physics_hz: float):
+        self.path = path
+        self.frames = 0
+        self._fh = open(path, "wb")
+        self._fh.write(self.HEADER.pack(self.MAGIC, self.VERSION, seed, width, height, physics_hz))
+
+    def frame(self, dt: float) -> None:
+        self._fh.write(b"F" + self.FRAME.pack(dt))
+        self.frames += 1
+
+    def launch(self, pos: Tuple[float, float], mode: str, color: Optional[Tuple[int, int, int]]) -> None:
+        rgb = tuple(color[:3]) if color is not None else (0, 0, 0)
+        self._fh.write(b"L" + self.LAUNCH.pack(pos[0], pos[1], list(PATTERNS).index(mode), color is not None, *rgb))
+
+    def quality(self, level: int) -> None:
+        self._fh.write(b"Q" + self.QUALITY.pack(level))
+
+    def close(self, digest: bytes) -> None:
+        if self._fh.closed:
+            return
+        self._fh.write(b"E" + self.END.pack(self.frames, digest))
+        self._fh.close()
+
+    @classmethod
+    def read(cls, path: str) -> Tuple[Dict[str, object], List[Tuple[bytes, tuple]]]:
+        """Header fields and the decoded ``(tag, values)`` records; a log cut short simply ends early."""
+        with open(path, "rb") as fh:
+            data = fh.read()
+        magic, version, seed, width, height, physics_hz = cls.HEADER.unpack_from(data)
+        if magic != cls.MAGIC or version != cls.VERSION:
+            raise ValueError(f"{path} is not a version {cls.VERSION} session log")
+        header = {"seed": seed, "width": width, "height": height, "physics_hz": physics_hz}
+        records = []
+        offset = cls.HEADER.size
+        while offset < len(data):
+            tag = data[offset:offset + 1]
+            payload = cls.PAYLOADS.get(tag)
+            if payload is None:
+                raise ValueError(f"corrupt session log {path}: unknown record {tag!r} at byte {offset}")
+            if offset + 1 + payload.size > len(data):
+                break
+            records.append((tag, payload.unpack_from(data, offset + 1)))
+            offset += 1 + payload.size
+        return header, records
+
 
 class Settings:
     def __init__(self):
-        self.modes: List[str] = ["burst", "ring", "star", "trail"]
+        self.modes: List[str] = list(PATTERNS)
         self.effect_mode: str = self.modes[0]
         self.color_mode: str = "random"
         self.custom_color: List[int] = [255, 0, 0]
+        self.render_path: str = ParticleStore.RENDER_PATHS[0]
+        self.bloom_quality: str = "medium"
+        self.trail_seconds: float = 0.6
 
 class FireworksSimulation:
-    def __init__(self, width: int = 1600, height: int = 900):
+    def __init__(self, width: int = 1600, height: int = 900, headless: bool = False, seed: Optional[int] = None,
+                 profile_dump: Optional[str] = None, profile_interval: float = 10.0, physics_hz: float = 60.0,
+                 pipeline_depth: int = 1, star_count: int = 200, cloud_hz: Optional[float] = None,
+                 asset_cache: Optional[AssetCache] = None, frame_budget_ms: Optional[float] = None, shards: int = 0,
+                 trail_seconds: Optional[float] = None):
+        self.startup_times: Dict[str, float] = {}
+        mark = time.perf_counter()
+
+        def timed(phase: str) -> None:
+            nonlocal mark
+            now = time.perf_counter()
+            self.startup_times[phase] = (now - mark) * 1000.0
+            mark = now
+
+        # Only the subsystems the simulation uses; audio, joystick etc. stay uninitialized;
+        pygame.display.init()
+        pygame.font.init()
+        timed("pygame_init")
         self.WIDTH = width
         self.HEIGHT = height
-        self.SCREEN = pygame.display.set_mode((self.WIDTH, self.HEIGHT), pygame.DOUBLEBUF | pygame.SCALED, vsync=1)
+        self.headless = headless
+        # Every random draw of the simulation comes from streams of this one root seed;
+        self.rng = RandomBlocks(seed)
+        if headless:
+            self.SCREEN = pygame.display.set_mode((self.WIDTH, self.HEIGHT))
+        else:
+            self.SCREEN = pygame.display.set_mode((self.WIDTH, self.HEIGHT), pygame.DOUBLEBUF | pygame.SCALED, vsync=1)
         pygame.display.set_caption("Starry Fireworks Simulation")
         self.CLOCK = pygame.time.Clock()
         self.BLACK = (0, 0, 0)
         self.settings = Settings()
-        self.starfield = Starfield(200, self.WIDTH, self.HEIGHT)
-        self.clouds = CloudLayer(self.WIDTH, self.HEIGHT)
+        timed("display")
+
+        self.targets = RenderTargetPool()
+
+        # Generated assets are keyed by resolution and seed and cached on disk between runs;
+        self.assets = asset_cache if asset_cache is not None else AssetCache()
+        self.asset_seed = seed if seed is not None else 0
+        size = (self.WIDTH, self.HEIGHT)
+        layout = self.assets.load_or_build(
+            f"stars{star_count}", size, self.asset_seed,
+            lambda: Starfield.generate_layout(star_count, self.WIDTH, self.HEIGHT, 3, RandomBlocks(self.asset_seed)),
+        )
+        self.starfield = Starfield(star_count, self.WIDTH, self.HEIGHT, layout=layout)
+        timed("starfield")
+        noise = self.assets.load_or_build(
+            "clouds", size, self.asset_seed,
+            lambda: CloudLayer.generate_noise(self.WIDTH, self.HEIGHT, RandomBlocks(self.asset_seed)),
+        )
+        self.clouds = CloudLayer(self.WIDTH, self.HEIGHT, update_hz=cloud_hz, noise=noise, pool=self.targets)
+        timed("clouds")
+        glow_keys = self.assets.load(f"glow{ParticleStore.glow_cache.color_step}-keys")
+        glow_pixels = self.assets.load(f"glow{ParticleStore.glow_cache.color_step}-rgba")
+        if glow_keys is not None and glow_pixels is not None:
+            ParticleStore.glow_cache.import_arrays(glow_keys, glow_pixels)
+        timed("glow")
+        # With shards > 0 integration runs in that many worker processes over shared memory;
+        self.store = SharedParticleStore(shards) if shards else ParticleStore()
         self.fireworks: List[Firework] = []
+        # Pre-sampled firework events (secondary bursts) on the simulation clock;
+        self.events = EventQueue()
+        self.sim_time = 0.0
         self.launching = False
         self.time_since_launch = 0
         self.launch_interval = 0.15
+        # Scripted launches; ``show_time`` is the show clock at the start of the current frame;
+        self.schedule: Optional[LaunchScheduler] = None
+        self.show_time = 0.0
+        self.seed = seed
+        self.physics_hz = physics_hz
+        self.recorder: Optional[SessionLog] = None
+        self._recorded_level: Optional[int] = None
+        # Fixed-timestep simulation: frame dt feeds an accumulator drained in sim_dt steps;
+        self.sim_dt = 1.0 / physics_hz
+        self.max_substeps = 8
+        self.accumulator = 0.0
+        self.interp_alpha = 1.0
+        self.bloom = BloomPass(self.settings.bloom_quality, pool=self.targets)
+        if trail_seconds is not None:
+            self.settings.trail_seconds = trail_seconds
+        self.trails = TrailBuffer(self.settings.trail_seconds, pool=self.targets)
+        self.frame_dt = 1.0 / 60.0
+        # Bloom of frame N runs on a worker while frame N+1 is simulated and drawn;
+        self.pipeline = FramePipeline(self.bloom.apply, pipeline_depth, prepare=self.bloom.prepare)
+        self.profiler = FrameProfiler(dump_path=profile_dump, dump_interval=profile_interval)
+        # Trades particle density, secondaries, bloom and clouds for frame time; off unless given a budget;
+        self.governor = QualityGovernor(frame_budget_ms or 16.6, enabled=bool(frame_budget_ms))
+        self.evicted = 0
         self.manager = pygame_gui.UIManager((self.WIDTH, self.HEIGHT))
         self.effect_mode_dropdown = pygame_gui.elements.UIDropDownMenu(
             options_list=self.settings.modes,
@@ -277,24 +1967,338 @@ class FireworksSimulation:
         )
         if self.settings.color_mode == "random":
             self.pick_color_button.disable()
+        self.quality_label = pygame_gui.elements.UILabel(
+            relative_rect=pygame.Rect((10, 130), (150, 30)),
+            text="",
+            manager=self.manager,
+        )
+        self.apply_quality()
+        self.ui_index = UIHitIndex(self.manager)
+        timed("ui")
+        self.startup_times["total"] = sum(self.startup_times.values())
+
+    def save_assets(self) -> None:
+        """Persist the glow sprites generated this session for the next start."""
+        cache = ParticleStore.glow_cache
+        if len(cache):
+            keys, pixels = cache.export_arrays()
+            self.assets.save(f"glow{cache.color_step}-keys", keys)
+            self.assets.save(f"glow{cache.color_step}-rgba", pixels)
+
+    def startup_report(self) -> Dict[str, object]:
+        return {
+            "startup_ms": {phase: round(ms, 3) for phase, ms in self.startup_times.items()},
+            "asset_cache": {"dir": self.assets.directory, "hits": self.assets.hits, "misses": self.assets.misses},
+        }
 
     def is_mouse_over_ui(self) -> bool:
-        for element in get_all_ui_elements(self.manager.get_root_container()):
-            if element.visible and element.combined_rect.collidepoint(pygame.mouse.get_pos()):
-                return True
-        return False
+        return self.ui_index.hit(pygame.mouse.get_pos())
+
+    def set_bloom_quality(self, quality: str) -> None:
+        if quality not in BloomPass.QUALITY:
+            raise ValueError(f"unknown bloom quality {quality!r}; expected one of {list(BloomPass.QUALITY)}")
+        self.settings.bloom_quality = quality
+        self.apply_quality()
+
+    @property
+    def quality_level(self) -> str:
+        return self.governor.current.name
+
+    def set_quality_level(self, level) -> None:
+        """Select a quality level by name or index (0 = highest)."""
+        self.governor.set_level(level)
+        self.apply_quality()
+
+    def apply_quality(self) -> None:
+        """Push the governor's current level into bloom and the UI."""
+        level = self.governor.current
+        qualities = list(BloomPass.QUALITY)
+        bloom = qualities[min(qualities.index(self.settings.bloom_quality), qualities.index(level.bloom))]
+        if bloom != self.bloom.quality:
+            self.bloom.set_quality(bloom)
+        self.quality_label.set_text(f"Quality: {level.name}" + (" (auto)" if self.governor.enabled else ""))
+        if self.recorder is not None and self.governor.level != self._recorded_level:
+            self.recorder.quality(self.governor.level)
+            self._recorded_level = self.governor.level
+
+    def launch(self, pos: Tuple[int, int], mode: Optional[str] = None, color: Optional[Tuple[int, int, int]] = None) -> Firework:
+        level = self.governor.current
+        mode = mode or self.settings.effect_mode
+        if self.recorder is not None:
+            self.recorder.launch(pos, mode, color)
+        firework = Firework(self.store, pos, mode, color, density=level.density,
+                            secondary_chance=level.secondary_chance, rng=self.rng, events=self.events)
+        self.fireworks.append(firework)
+        return firework
+
+    def load_show(self, show) -> LaunchScheduler:
+        """Start a show from a file path or a ready LaunchScheduler; the show clock restarts at 0."""
+        self.schedule = show if isinstance(show, LaunchScheduler) else LaunchScheduler.load(show)
+        self.show_time = 0.0
+        return self.schedule
+
+    def fire_due_cues(self) -> int:
+        if self.schedule is None:
+            return 0
+        cues = self.schedule.due(self.show_time)
+        for cue in cues:
+            self.launch((cue["x"], cue["y"]), cue["mode"], cue["color"])
+        return len(cues)
+
+    def start_recording(self, path: str) -> SessionLog:
+        """Log this session's input for replay; needs the seed the simulation was created with."""
+        if self.seed is None:
+            raise ValueError("recording needs a seeded simulation (pass seed=...)")
+        self.recorder = SessionLog(path, self.seed, self.WIDTH, self.HEIGHT, self.physics_hz)
+        self.recorder.quality(self.governor.level)
+        self._recorded_level = self.governor.level
+        return self.recorder
+
+    def stop_recording(self) -> None:
+        if self.recorder is not None:
+            self.recorder.close(self.state_digest())
+            self.recorder = None
+
+    def state_digest(self) -> bytes:
+        """Digest of the live particle state, for checking that a replay matched its recording."""
+        n = self.store.count
+        h = hashlib.blake2b(digest_size=16)
+        for arr in (self.store.pos, self.store.vel, self.store.life, self.store.color):
+            h.update(np.ascontiguousarray(arr[:n]).tobytes())
+        h.update(len(self.fireworks).to_bytes(4, "little"))
+        return h.digest()
+
+    def replay(self, records: List[Tuple[bytes, tuple]]) -> Dict[str, object]:
+        """Feed recorded input back as fast as possible; returns per-stage ms and the state check."""
+        self.governor.enabled = False
+        frames = sum(1 for tag, _ in records if tag == b"F")
+        prof = self.profiler = FrameProfiler(history=max(1, frames))
+        expected = None
+        prof.begin_frame()
+        for tag, values in records:
+            if tag == b"L":
+                x, y, mode, has_color, r, g, b = values
+                self.launch((x, y), list(PATTERNS)[mode], (r, g, b) if has_color else None)
+            elif tag == b"F":
+                prof.lap("launch")
+                self.update(values[0])
+                finished = self.pipeline.submit(self.render())
+                prof.lap("bloom")
+                self.present_frame(finished)
+                self.end_frame()
+                prof.begin_frame()
+            elif tag == b"Q":
+                self.set_quality_level(values[0])
+            elif tag == b"E":
+                expected = values[1]
+        for buffer_surf in self.pipeline.drain():
+            self.targets.release(buffer_surf)
+        samples = prof.samples()
+        samples["present"] = [a + b for a, b in zip(samples["draw_ui"], samples["flip"])]
+        digest = self.state_digest()
+        return {
+            "samples": samples,
+            "frames": frames,
+            "digest": digest.hex(),
+            "matches": None if expected is None else digest == expected,
+        }
+
+    def step(self, dt: float) -> None:
+        """Advance the particle simulation by exactly one fixed step."""
+        self.sim_time += dt
+        self.events.now = self.sim_time
+        self.store.integrate(dt)
+        for f in self.fireworks:
+            f.update(dt)
+        for firework, kind in self.events.advance(self.sim_time):
+            firework.handle_event(kind)
+        cap = self.governor.current.particle_cap
+        if cap is not None and len(self.store) > cap:
+            # Eviction ranks every spark at once, so it runs here, between retirement and compaction;
+            self.store.retire_offscreen(self.WIDTH, self.HEIGHT)
+            self.evicted += self.store.evict(len(self.store) - cap)
+            self.store.cull()
+        else:
+            self.store.cull(self.WIDTH, self.HEIGHT)
+        self.fireworks = [f for f in self.fireworks if f.alive]
+
+    def update(self, dt: float) -> None:
+        prof = self.profiler
+        if self.recorder is not None:
+            self.recorder.frame(dt)
+        self.frame_dt = dt
+        self.starfield.update(dt)
+        prof.lap("starfield")
+        if self.governor.current.clouds:
+            self.clouds.update(dt)
+        prof.lap("clouds")
+        sim_dt = self.sim_dt
+        self.accumulator = min(self.accumulator + dt, sim_dt * self.max_substeps)
+        # The epsilon keeps fixed-dt callers (dt == sim_dt) at exactly one step per frame;
+        while self.accumulator >= sim_dt - 1e-9:
+            self.step(sim_dt)
+            self.accumulator -= sim_dt
+        self.interp_alpha = min(1.0, max(0.0, self.accumulator / sim_dt))
+        prof.lap("update")
+
+    def render(self) -> pygame.Surface:
+        prof = self.profiler
+        # Released back to the pool once presented (see present_frame);
+        buffer_surf = self.targets.acquire((self.WIDTH, self.HEIGHT), pygame.SRCALPHA)
+        buffer_surf.fill(self.BLACK)
+        prof.lap("background")
+        self.starfield.draw(buffer_surf)
+        prof.lap("starfield")
+        if self.governor.current.clouds:
+            self.clouds.draw(buffer_surf)
+        prof.lap("clouds")
+        trail_surf = self.trails.begin(buffer_surf, self.frame_dt, bool(self.store.trail_groups))
+        self.store.draw(buffer_surf, self.settings.render_path, self.interp_alpha, trail_surf)
+        if trail_surf is not None:
+            self.trails.composite(buffer_surf)
+        prof.lap("draw")
+        return buffer_surf
+
+    def present(self, buffer_surf: pygame.Surface) -> None:
+        prof = self.profiler
+        self.SCREEN.blit(buffer_surf, (0, 0))
+        self.manager.draw_ui(self.SCREEN)
+        prof.draw_overlay(self.SCREEN)
+        prof.lap("draw_ui")
+        pygame.display.flip()
+        prof.lap("flip")
+
+    def present_frame(self, buffer_surf: Optional[pygame.Surface]) -> None:
+        """Present a finished frame from the pipeline and recycle its buffer."""
+        if buffer_surf is not None:
+            self.present(buffer_surf)
+            self.targets.release(buffer_surf)
+
+    def end_frame(self) -> None:
+        cache = self.store.glow_cache
+        self.profiler.end_frame(
+            particles=len(self.store),
+            fireworks=len(self.fireworks),
+            glow_entries=len(cache),
+            glow_bytes=cache.bytes,
+            target_allocs=self.targets.allocations,
+            quality_level=self.governor.level,
+            evicted=self.evicted,
+            culled=self.store.culled,
+            bursts_culled=self.store.groups_culled,
+            retired=self.store.retired,
+        )
+        # Vsync waits inside flip are not work the governor can shed;
+        last = self.profiler.last()
+        if self.governor.update(last["frame"] - last["flip"]):
+            self.apply_quality()
+
+    def run_benchmark(self, mode: str, count: int, frames: int, dt: float = 1 / 60, seed: int = 0) -> Dict[str, List[float]]:
+        """Keep ``count`` fireworks of ``mode`` in flight for ``frames`` fixed-dt frames; returns per-stage ms."""
+        launcher = random.Random(seed)
+        prof = self.profiler = FrameProfiler(history=max(1, frames))
+        for _ in range(frames):
+            prof.begin_frame()
+            pygame.event.pump()
+            prof.lap("events")
+            self.manager.update(dt)
+            prof.lap("ui_update")
+            while len(self.fireworks) < count:
+                self.launch((launcher.uniform(0.1, 0.9) * self.WIDTH, launcher.uniform(0.6, 1.0) * self.HEIGHT), mode)
+            prof.lap("launch")
+            self.update(dt)
+            finished = self.pipeline.submit(self.render())
+            prof.lap("bloom")
+            self.present_frame(finished)
+            self.end_frame()
+        for buffer_surf in self.pipeline.drain():
+            self.targets.release(buffer_surf)
+        samples = prof.samples()
+        samples["present"] = [a + b for a, b in zip(samples["draw_ui"], samples["flip"])]
+        return samples
+
+    def close(self) -> None:
+        self.pipeline.close()
+        self.store.close()
+
+    def compile_show(self, frames: int, dt: float) -> ShowTimeline:
+        """Compile the loaded show for closed-form playback; uses a fresh stream of the simulation's seed."""
+        return ShowTimeline.compile(self.schedule, frames, dt, RandomBlocks(self.seed), self.governor.current,
+                                    self.settings.effect_mode, self.WIDTH, self.HEIGHT, self.sim_dt, self.max_substeps)
+
+    def show_frame(self, timeline: ShowTimeline, frame: int, trails_only: bool = False) -> None:
+        """Load ``frame`` of a compiled show into the particle store, evaluated directly from the closed form."""
+        pos, prev_pos, color, radius, life, group, trail_groups = timeline.state(frame, trails_only=trails_only)
+        self.store.assign(pos, prev_pos, color, radius, life, group, trail_groups)
+        self.interp_alpha = float(timeline.alphas[frame])
+
+    def skip_frame_trails(self) -> None:
+        """Advance the trail buffer through a frame that is simulated but not drawn."""
+        has_sparks = bool(self.store.trail_groups)
+        if not self.trails.enabled or (not has_sparks and self.trails.level <= 0):
+            return
+        frame = self.targets.acquire((self.WIDTH, self.HEIGHT), pygame.SRCALPHA)
+        trail_surf = self.trails.begin(frame, self.frame_dt, has_sparks)
+        if trail_surf is not None:
+            self.store.draw_trails(trail_surf, self.settings.render_path, self.interp_alpha)
+        self.targets.release(frame)
+
+    def render_offline(self, start: int, stop: int, dt: float,
+                       write: Optional[Callable[[int, pygame.Surface], None]] = None, closed_form: bool = False) -> None:
+        """Play the loaded show for frames ``[0, stop)`` at a fixed ``dt``; frames from ``start`` go to ``write``."""
+        # In closed form seeking costs no particle work; either way skipped frames still feed the trail buffer;
+        timeline = self.compile_show(stop, dt) if closed_form else None
+        seek_trails = timeline is not None and self.trails.enabled and bool(timeline.trail.any())
+        for frame in range(stop):
+            self.show_time = frame * dt
+            if timeline is None:
+                self.fire_due_cues()
+                self.update(dt)
+            else:
+                # The backdrop is stepped as update() would; the sparks come from the timeline;
+                self.frame_dt = dt
+                self.starfield.update(dt)
+                if self.governor.current.clouds:
+                    self.clouds.update(dt)
+            if frame < start:
+                if seek_trails:
+                    self.show_frame(timeline, frame, trails_only=True)
+                self.skip_frame_trails()
+                continue
+            if timeline is not None:
+                self.show_frame(timeline, frame)
+            buffer_surf = self.bloom.apply(self.render())
+            if write is not None:
+                write(frame, buffer_surf)
+            self.targets.release(buffer_surf)
 
     async def run(self):
         running = True
         while running:
             dt = self.CLOCK.tick(0) / 1000.0
+            prof = self.profiler
+            prof.begin_frame()
             for event in pygame.event.get():
                 if event.type == pygame.QUIT:
                     running = False
                 self.manager.process_events(event)
+                self.ui_index.process_event(event)
                 if event.type == pygame.KEYDOWN:
                     if event.key == pygame.K_ESCAPE:
                         running = False
+                    elif event.key == pygame.K_F2:
+                        paths = ParticleStore.RENDER_PATHS
+                        self.settings.render_path = paths[(paths.index(self.settings.render_path) + 1) % len(paths)]
+                    elif event.key == pygame.K_F5:
+                        qualities = list(BloomPass.QUALITY)
+                        self.set_bloom_quality(qualities[(qualities.index(self.settings.bloom_quality) + 1) % len(qualities)])
+                    elif event.key == pygame.K_F6:
+                        self.governor.enabled = not self.governor.enabled
+                        self.apply_quality()
+                    elif event.key == pygame.K_F3:
+                        prof.show_overlay = not prof.show_overlay
+                    elif event.key == pygame.K_F4:
+                        prof.dump(prof.dump_path or "frame_profile.csv")
                 if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
                     if not self.is_mouse_over_ui():
                         self.launching = True
@@ -322,34 +2326,154 @@ class FireworksSimulation:
                         self.settings.effect_mode = event.text
                 if event.type == pygame_gui.UI_COLOUR_PICKER_COLOUR_PICKED:
                     self.settings.custom_color = [event.colour.r, event.colour.g, event.colour.b]
+            prof.lap("events")
             self.manager.update(dt)
+            prof.lap("ui_update")
             if self.launching and self.is_mouse_over_ui():
                 self.launching = False
             self.time_since_launch += dt
             if self.launching and self.time_since_launch >= self.launch_interval:
                 c = self.settings.custom_color if self.settings.color_mode == "custom" else None
-                self.fireworks.append(Firework(pygame.mouse.get_pos(), self.settings.effect_mode, c))
+                self.launch(pygame.mouse.get_pos(), self.settings.effect_mode, c)
                 self.time_since_launch = 0
-            self.starfield.update(dt)
-            self.clouds.update(dt)
-            for f in self.fireworks:
-                f.update(dt)
-            self.fireworks = [f for f in self.fireworks if not (f.exploded and not f.particles and not f.secondary)]
-            buffer_surf = pygame.Surface((self.WIDTH, self.HEIGHT), pygame.SRCALPHA)
-            buffer_surf.fill(self.BLACK)
-            self.starfield.draw(buffer_surf)
-            self.clouds.draw(buffer_surf)
-            for f in self.fireworks:
-                f.draw(buffer_surf)
-            buffer_surf = await asyncio.to_thread(bloom_pass, buffer_surf)
-            self.SCREEN.blit(buffer_surf, (0, 0))
-            self.manager.draw_ui(self.SCREEN)
-            pygame.display.flip()
+            self.fire_due_cues()
+            self.show_time += dt
+            prof.lap("launch")
+            self.update(dt)
+            finished = await self.pipeline.submit_async(self.render())
+            prof.lap("bloom")
+            self.present_frame(finished)
+            self.end_frame()
             await asyncio.sleep(0)
+        # The end record digests the live store, which close() clears;
+        self.stop_recording()
+        self.close()
+        self.save_assets()
+        pygame.quit()
+
+def run_replay(path: str) -> Dict[str, object]:
+    """Replay a recorded session headlessly; see FireworksSimulation.replay."""
+    header, records = SessionLog.read(path)
+    sim = FireworksSimulation(header["width"], header["height"], headless=True, seed=header["seed"],
+                              physics_hz=header["physics_hz"])
+    try:
+        return sim.replay(records)
+    finally:
+        sim.close()
+        pygame.quit()
+
+def run_draw_benchmark(render_path: str, count: int, frames: int = 10, seed: int = 0,
+                       size: Tuple[int, int] = (1600, 900)) -> Dict[str, List[float]]:
+    """Time only ParticleStore.draw for ``count`` random sparks on ``render_path``; returns ms per frame."""
+    pygame.display.init()
+    pygame.display.set_mode((1, 1))
+    try:
+        rng = np.random.RandomState(seed)
+        store = ParticleStore(count)
+        for lo in range(0, count, 60):
+            n = min(60, count - lo)
+            # Spawned at the origin; every position is scattered over the frame below;
+            store.spawn((0.0, 0.0), rng.uniform(-5, 5, (n, 2)),
+                        rng.randint(128, 256, (n, 3)), rng.choice([1.2, 1.3, 1.6, 2.0]), 2.0)
+        store.pos[:count] = rng.uniform((0, 0), size, (count, 2))
+        frame = pygame.Surface(size, pygame.SRCALPHA)
+        times = []
+        for _ in range(frames):
+            frame.fill((0, 0, 0))
+            t0 = time.perf_counter()
+            store.draw(frame, render_path)
+            times.append((time.perf_counter() - t0) * 1000.0)
+        return {"draw": times, "frame": times}
+    finally:
+        pygame.quit()
+
+def run_benchmark(mode: str, count: int, frames: int, seed: int = 0, dt: float = 1 / 60,
+                  pipeline_depth: int = 0, render_path: str = ParticleStore.RENDER_PATHS[0]) -> Dict[str, List[float]]:
+    # Synchronous bloom by default, so "bloom" is the bloom's cost, comparable with Firework.py and V3;
+    sim = FireworksSimulation(headless=True, seed=seed, pipeline_depth=pipeline_depth)
+    sim.settings.render_path = render_path
+    try:
+        return sim.run_benchmark(mode, count, frames, dt=dt, seed=seed)
+    finally:
+        sim.close()
         pygame.quit()
 
 async def main():
-    sim = FireworksSimulation()
+    parser = argparse.ArgumentParser(description="Starry Fireworks Simulation")
+    parser.add_argument("--profile-dump", metavar="PATH", help="periodically write frame timings to PATH (.csv or .json)")
+    parser.add_argument("--profile-interval", type=float, default=10.0, help="seconds between profile dumps")
+    parser.add_argument("--physics-hz", type=float, default=60.0, help="fixed simulation rate, independent of display FPS")
+    parser.add_argument("--pipeline-depth", type=int, default=1, help="frames bloomed in the background (0 = synchronous)")
+    parser.add_argument("--stars", type=int, default=200, help="number of background stars")
+    parser.add_argument("--cloud-hz", type=float, help="re-lay the scrolling cloud layer at this rate instead of every frame")
+    parser.add_argument("--no-asset-cache", action="store_true", help="regenerate textures instead of using the on-disk cache")
+    parser.add_argument("--frame-budget", type=float, default=16.6, help="target frame time in ms for the quality governor (0 = off)")
+    parser.add_argument("--quality", choices=[q.name for q in QualityGovernor.LEVELS], help="starting quality level")
+    parser.add_argument("--trail-seconds", type=float, help="fade time of the trail buffer (0 = no trails)")
+    parser.add_argument("--shards", type=int, default=0, help="step particles in this many worker processes")
+    parser.add_argument("--render-path", choices=ParticleStore.RENDER_PATHS, help="spark renderer (F2 cycles at runtime)")
+    parser.add_argument("--show", metavar="PATH", help="play a JSON/TOML show file of timed launches")
+    parser.add_argument("--headless", action="store_true", help="with --show: render the show off-screen at a fixed dt and exit")
+    parser.add_argument("--closed-form", action="store_true", help="with --headless: evaluate sparks from a compiled timeline")
+    parser.add_argument("--seed", type=int, help="seed the simulation RNG (a random seed is picked when recording)")
+    parser.add_argument("--record", metavar="PATH", help="record input, timing and seed to a session log")
+    parser.add_argument("--replay", metavar="PATH", help="replay a session log headlessly and print per-stage timings")
+    parser.add_argument("--startup-report", action="store_true", help="print startup timings as JSON to stderr")
+    args = parser.parse_args()
+    if args.replay:
+        os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+        result = run_replay(args.replay)
+        summary = {
+            stage: round(float(np.percentile(values, 50)), 4) if values else 0.0
+            for stage, values in result.pop("samples").items() if stage in FrameProfiler.PHASES + ("frame", "present")
+        }
+        print(json.dumps({**result, "p50_ms": summary}))
+        return
+    if args.headless and not args.show:
+        parser.error("--headless needs --show")
+    if args.closed_form and args.record:
+        # Closed form never runs update() or launch(), so there would be no input to record;
+        parser.error("--record needs the stepped simulation; drop --closed-form")
+    schedule = LaunchScheduler.load(args.show) if args.show else None
+    if args.headless:
+        # Deterministic: fixed dt, the show's seed, and no frame-time-driven quality changes;
+        os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+        meta = schedule.meta
+        sim = FireworksSimulation(
+            int(meta.get("width", 1600)), int(meta.get("height", 900)), headless=True, seed=int(meta.get("seed", 0)),
+            profile_dump=args.profile_dump, profile_interval=args.profile_interval, physics_hz=args.physics_hz,
+            pipeline_depth=0, star_count=args.stars, cloud_hz=args.cloud_hz,
+            asset_cache=AssetCache(enabled=not args.no_asset_cache), shards=args.shards,
+            trail_seconds=args.trail_seconds,
+        )
+    else:
+        sim = FireworksSimulation(
+            profile_dump=args.profile_dump, profile_interval=args.profile_interval, physics_hz=args.physics_hz,
+            pipeline_depth=args.pipeline_depth, star_count=args.stars, cloud_hz=args.cloud_hz,
+            asset_cache=AssetCache(enabled=not args.no_asset_cache), frame_budget_ms=args.frame_budget,
+            seed=args.seed if args.seed is not None or not args.record else random.SystemRandom().randrange(2 ** 31),
+            shards=args.shards, trail_seconds=args.trail_seconds,
+        )
+    if args.quality:
+        sim.set_quality_level(args.quality)
+    if args.render_path:
+        sim.settings.render_path = args.render_path
+    if args.startup_report:
+        print(json.dumps(sim.startup_report()), file=sys.stderr)
+    if schedule is not None:
+        sim.load_show(schedule)
+    if args.record:
+        sim.start_recording(args.record)
+    if args.headless:
+        fps = float(schedule.meta.get("fps", 60))
+        frames = int(round(float(schedule.meta.get("duration", schedule.end_time + 4.0)) * fps))
+        start = time.perf_counter()
+        sim.render_offline(0, frames, 1.0 / fps, closed_form=args.closed_form)
+        print(json.dumps({"frames": frames, "elapsed_s": round(time.perf_counter() - start, 3)}))
+        sim.stop_recording()
+        sim.close()
+        pygame.quit()
+        return
     await sim.run()
 
 if __name__ == "__main__":
@@ -16,14 +16,15 @@ import math
 import random
 import time
 import threading
-from typing import List, Optional, Tuple
+from typing import Dict, List, Optional, Tuple
 
 import numpy as np  # Optimized: NOISE-GEN;
 import pygame
 import pygame_gui
 from pygame.math import Vector2
 
-pygame.init()
+# Spark render paths: glows grouped per sprite into one fblits call, or one blit per particle;
+RENDER_PATHS = ("batched", "immediate")
 
 
 def get_all_ui_elements(container) -> List[pygame_gui.core.UIElement]:
@@ -63,7 +64,7 @@ class Particle:
         self.pos += self.vel * dt * 60
         self.life -= dt
 
-    def draw(self, surf: pygame.Surface) -> None:
+    def draw(self, surf: pygame.Surface, batch: Optional[Dict[tuple, List[Tuple[int, int]]]] = None) -> None:
         if self.life <= 0:
             return
 
@@ -85,11 +86,21 @@ class Particle:
                 pygame.draw.circle(glow, col, (base_size // 2, base_size // 2), r)
             Particle._glow_cache[cache_key] = glow
 
-        surf.blit(
-            glow,
-            (int(self.pos.x - base_size // 2), int(self.pos.y - base_size // 2)),
-            special_flags=pygame.BLEND_ADD,
-        )
+        dest = (int(self.pos.x - base_size // 2), int(self.pos.y - base_size // 2))
+        if batch is not None:
+            batch.setdefault(cache_key, []).append(dest)
+            return
+        surf.blit(glow, dest, special_flags=pygame.BLEND_ADD)
+
+    @staticmethod
+    def blit_batch(surf: pygame.Surface, batch: Dict[tuple, List[Tuple[int, int]]]) -> None:
+        # Additive blending is order-independent, so the sparks collected by draw(batch=...) go
+        # out grouped by sprite in one fblits call instead of one blit per particle;
+        blit_sequence = [(Particle._glow_cache[key], dest) for key, dests in batch.items() for dest in dests]
+        if hasattr(surf, "fblits"):
+            surf.fblits(blit_sequence, pygame.BLEND_ADD)
+        else:
+            surf.blits([(glow, dest, None, pygame.BLEND_ADD) for glow, dest in blit_sequence], doreturn=False)
 
 
 class Firework:
@@ -138,14 +149,14 @@ class Firework:
                 s.update(dt)
             self.secondary = [p for p in self.secondary if p.life > 0]
 
-    def draw(self, surf: pygame.Surface) -> None:
+    def draw(self, surf: pygame.Surface, batch: Optional[Dict[tuple, List[Tuple[int, int]]]] = None) -> None:
         if not self.exploded:
-            self.rocket.draw(surf)
+            self.rocket.draw(surf, batch)
         else:
             for p in self.particles:
-                p.draw(surf)
+                p.draw(surf, batch)
             for p in self.secondary:
-                p.draw(surf)
+                p.draw(surf, batch)
 
     def explode(self) -> None:
         if self.mode == "burst":
@@ -283,15 +294,28 @@ class Settings:
         self.effect_mode: str = self.modes[0]
         self.color_mode: str = "random"
         self.custom_color: List[int] = [255, 0, 0]
+        self.render_path: str = RENDER_PATHS[0]
 
 
 class FireworksSimulation:
-    def __init__(self, width: int = 1600, height: int = 900):
+    STAGES = ("update", "starfield", "clouds", "draw", "bloom", "present")
+
+    def __init__(self, width: int = 1600, height: int = 900, headless: bool = False, seed: Optional[int] = None):
         self.WIDTH = width
         self.HEIGHT = height
-        self.SCREEN = pygame.display.set_mode(
-            (self.WIDTH, self.HEIGHT), pygame.DOUBLEBUF | pygame.SCALED, vsync=1
-        )
+        self.headless = headless
+        # Only the subsystems the simulation uses, and only when it is built, not on import;
+        pygame.display.init()
+        pygame.font.init()
+        if seed is not None:
+            random.seed(seed)
+            np.random.seed(seed)
+        if headless:
+            self.SCREEN = pygame.display.set_mode((self.WIDTH, self.HEIGHT))
+        else:
+            self.SCREEN = pygame.display.set_mode(
+                (self.WIDTH, self.HEIGHT), pygame.DOUBLEBUF | pygame.SCALED, vsync=1
+            )
         pygame.display.set_caption("Starry Fireworks Simulation (OPTIMIZED-RELEASE)")
         self.CLOCK = pygame.time.Clock()
         self.BLACK = (0, 0, 0)
@@ -324,6 +348,79 @@ class FireworksSimulation:
         if self.settings.color_mode == "random":
             self.pick_color_button.disable()
 
+    def update(self, dt: float) -> None:
+        self.starfield.update(dt)
+        self.clouds.update(dt)
+        self.update_fireworks(dt)
+
+    def update_fireworks(self, dt: float) -> None:
+        for f in self.fireworks:
+            f.update(dt)
+        self.fireworks = [
+            f for f in self.fireworks if not (f.exploded and not f.particles and not f.secondary)
+        ]
+
+    def render(self) -> pygame.Surface:
+        buffer_surf = self.new_buffer()
+        self.starfield.draw(buffer_surf)
+        self.clouds.draw(buffer_surf)
+        self.draw_fireworks(buffer_surf)
+        return buffer_surf
+
+    def new_buffer(self) -> pygame.Surface:
+        buffer_surf = pygame.Surface((self.WIDTH, self.HEIGHT), pygame.SRCALPHA)
+        buffer_surf.fill(self.BLACK)
+        return buffer_surf
+
+    def draw_fireworks(self, buffer_surf: pygame.Surface) -> None:
+        if self.settings.render_path == "batched":
+            batch: Dict[tuple, List[Tuple[int, int]]] = {}
+            for f in self.fireworks:
+                f.draw(buffer_surf, batch)
+            Particle.blit_batch(buffer_surf, batch)
+        else:
+            for f in self.fireworks:
+                f.draw(buffer_surf)
+
+    def present(self, buffer_surf: pygame.Surface) -> None:
+        self.SCREEN.blit(buffer_surf, (0, 0))
+        self.manager.draw_ui(self.SCREEN)
+        pygame.display.flip()
+
+    def run_benchmark(self, mode: str, count: int, frames: int, dt: float = 1 / 60, seed: int = 0) -> Dict[str, List[float]]:
+        """Keep ``count`` fireworks of ``mode`` in flight for ``frames`` fixed-dt frames; returns per-stage ms."""
+        launcher = random.Random(seed)
+        samples: Dict[str, List[float]] = {stage: [] for stage in self.STAGES + ("frame",)}
+        for _ in range(frames):
+            # Same stages as update()/render() in run(), split here so only the benchmark pays for the timing;
+            times = dict.fromkeys(self.STAGES, 0.0)
+
+            def timed(stage: str, fn, *args):
+                t = time.perf_counter()
+                result = fn(*args)
+                times[stage] += time.perf_counter() - t
+                return result
+
+            start = time.perf_counter()
+            pygame.event.pump()
+            self.manager.update(dt)
+            while len(self.fireworks) < count:
+                pos = (launcher.uniform(0.1, 0.9) * self.WIDTH, launcher.uniform(0.6, 1.0) * self.HEIGHT)
+                self.fireworks.append(Firework(pos, mode))
+            timed("starfield", self.starfield.update, dt)
+            timed("clouds", self.clouds.update, dt)
+            timed("update", self.update_fireworks, dt)
+            buffer_surf = timed("starfield", self.new_buffer)
+            timed("starfield", self.starfield.draw, buffer_surf)
+            timed("clouds", self.clouds.draw, buffer_surf)
+            timed("draw", self.draw_fireworks, buffer_surf)
+            buffer_surf = timed("bloom", bloom_pass, buffer_surf)
+            timed("present", self.present, buffer_surf)
+            for stage, seconds in times.items():
+                samples[stage].append(seconds * 1000.0)
+            samples["frame"].append((time.perf_counter() - start) * 1000.0)
+        return samples
+
     async def run(self) -> None:
         running = True
         while running:
@@ -339,6 +436,9 @@ class FireworksSimulation:
                 if event.type == pygame.KEYDOWN:
                     if event.key == pygame.K_ESCAPE:
                         running = False
+                    elif event.key == pygame.K_F2:
+                        paths = RENDER_PATHS
+                        self.settings.render_path = paths[(paths.index(self.settings.render_path) + 1) % len(paths)]
 
                 if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
                     ui_under_mouse = False
@@ -392,31 +492,27 @@ class FireworksSimulation:
                 )
                 self.time_since_launch = 0
 
-            self.starfield.update(dt)
-            self.clouds.update(dt)
-            for f in self.fireworks:
-                f.update(dt)
-            self.fireworks = [
-                f for f in self.fireworks if not (f.exploded and not f.particles and not f.secondary)
-            ]
+            self.update(dt)
 
             # --- Drawing ---
-            buffer_surf = pygame.Surface((self.WIDTH, self.HEIGHT), pygame.SRCALPHA)
-            buffer_surf.fill(self.BLACK)
-            self.starfield.draw(buffer_surf)
-            self.clouds.draw(buffer_surf)
-            for f in self.fireworks:
-                f.draw(buffer_surf)
+            buffer_surf = self.render()
 
             buffer_surf = await asyncio.to_thread(bloom_pass, buffer_surf)
 
-            self.SCREEN.blit(buffer_surf, (0, 0))
-            self.manager.draw_ui(self.SCREEN)
-            pygame.display.flip()
+            self.present(buffer_surf)
 
             await asyncio.sleep(0)
         pygame.quit()
 
+def run_benchmark(mode: str, count: int, frames: int, seed: int = 0, dt: float = 1 / 60,
+                  render_path: str = RENDER_PATHS[0]) -> Dict[str, List[float]]:
+    sim = FireworksSimulation(headless=True, seed=seed)
+    sim.settings.render_path = render_path
+    try:
+        return sim.run_benchmark(mode, count, frames, dt=dt, seed=seed)
+    finally:
+        pygame.quit()
+
 async def main() -> None:
     sim = FireworksSimulation()
     await sim.run()